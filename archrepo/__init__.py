@@ -7,5 +7,7 @@ Arch Linux package repositories running in Docker containers.
 """
 
 from .api import ArchRepoClient
+from .pool import ArchRepoPool
+from .aio import AsyncArchRepoClient, AsyncArchRepoPool
 
-__version__ = "0.1.0"
+__version__ = "0.2.0"
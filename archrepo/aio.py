@@ -0,0 +1,313 @@
+"""
+aio.py - asyncio API for managing an Arch Linux package repository
+"""
+
+import asyncio
+import os
+import shlex
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+from .api import ArchRepoClient, _file_hash, _status_messages
+
+
+class AsyncArchRepoClient:
+    """
+    asyncio counterpart of ArchRepoClient, based on asyncssh.
+
+    The client keeps a single SSH connection; every operation runs in its own
+    session (channel) on it, so many operations can be in flight at once on one
+    event loop without a thread per operation:
+
+        async with AsyncArchRepoClient("archrepo") as client:
+            results = await asyncio.gather(client.list_packages(), client.get_status())
+    """
+
+    def __init__(self, host: str, digest: str = "sha512", **connect_kwargs):
+        """
+        Initialize a new AsyncArchRepoClient instance.
+
+        Args:
+            host: SSH host as specified in ~/.ssh/config
+            digest: Hash for upload verification, "sha512" or "sha256" (see ArchRepoClient)
+            connect_kwargs: Additional arguments for asyncssh.connect()
+        """
+        if asyncssh is None:
+            raise ImportError("AsyncArchRepoClient requires the asyncssh package (pip install archrepo[async])")
+
+        self.host = host
+        self.digest = digest
+        self.connect_kwargs = connect_kwargs
+        self._conn = None
+        self._connect_lock = None
+
+    async def connect(self) -> None:
+        """
+        Open the SSH connection, if it is not open yet.
+        """
+        # Operations started together (e.g. the uploads gathered by publish_package)
+        # must not open a connection each; created here to belong to the running loop
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._conn is None:
+                self._conn = await asyncssh.connect(self.host, **self.connect_kwargs)
+
+    async def close(self) -> None:
+        """
+        Close the SSH connection.
+        """
+        if self._conn is not None:
+            self._conn.close()
+            await self._conn.wait_closed()
+            self._conn = None
+
+    async def __aenter__(self) -> "AsyncArchRepoClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def _run_simple(self, command: str, error_prefix: str, parser: Callable[[str], tuple]) -> tuple:
+        """
+        Run a single shell command and interpret its output.
+
+        The command is fed to the shell session followed by "exit", like
+        ArchRepoClient does, so the output is parsed the same way.
+
+        Args:
+            command: Command to execute
+            error_prefix: Message to report, followed by stderr, if the session fails
+            parser: Function turning the command output into a (success, result) tuple
+
+        Returns:
+            Tuple of (success, result or error message)
+        """
+        await self.connect()
+        result = await self._conn.run(input=f"{command}\nexit\n")
+
+        if result.exit_status != 0:
+            return False, f"{error_prefix}: {result.stderr}"
+
+        return parser(result.stdout)
+
+    async def upload_raw(self, file_path: str, filename: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Upload a file to the server as raw bytes (see ArchRepoClient.upload_raw).
+
+        Args:
+            file_path: Path to the file to upload
+            filename: Name to use for the file on the server (defaults to the file's basename)
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if not os.path.isfile(file_path):
+            return False, f"File not found: {file_path}"
+
+        if filename is None:
+            filename = os.path.basename(file_path)
+
+        file_size = os.path.getsize(file_path)
+
+        # Hashing is CPU-bound, keep it off the event loop
+        file_hash = await asyncio.get_running_loop().run_in_executor(None, _file_hash, file_path, self.digest)
+
+        # The file is redirected to the session in binary mode
+        await self.connect()
+        result = await self._conn.run(
+            f"receive-raw {shlex.quote(filename)} {file_size} {file_hash}",
+            stdin=file_path, encoding=None)
+        stdout = result.stdout.decode('utf-8', 'replace')
+        stderr = result.stderr.decode('utf-8', 'replace')
+
+        messages = _status_messages(stdout)
+        if result.exit_status != 0 or not {"Successfully received file",
+                                           "Successfully received signature file"} & messages:
+            return False, f"Failed to upload {filename}: {stderr or stdout}"
+
+        return True, f"File {filename} uploaded successfully."
+
+    async def publish_package(self, package_path: str, no_signing: bool = False) -> Tuple[bool, str]:
+        """
+        Publish a package to the repository (upload and add in a single operation).
+        Also uploads the .sig signature file if it exists and no_signing is False.
+
+        Args:
+            package_path: Path to the package file
+            no_signing: If True, signature check will be skipped
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if not os.path.isfile(package_path):
+            return False, f"Package file not found: {package_path}"
+
+        filename = os.path.basename(package_path)
+        signature_path = f"{package_path}.sig"
+        signature_exists = os.path.isfile(signature_path)
+
+        if not signature_exists and not no_signing:
+            return False, f"Signature file not found: {signature_path}. Use --no-signing to skip signature check."
+
+        try:
+            # The package and its signature are independent, upload them concurrently
+            uploads = [self.upload_raw(package_path)]
+            if signature_exists and not no_signing:
+                uploads.append(self.upload_raw(signature_path, f"{filename}.sig"))
+            results = await asyncio.gather(*uploads)
+
+            success, message = results[0]
+            if not success:
+                return False, f"Upload failed: {message}"
+            if len(results) > 1 and not results[1][0]:
+                return False, f"Package uploaded but signature transfer failed: {results[1][1]}"
+
+            return await self._run_simple(
+                f"add {filename}", "Operation failed",
+                lambda stdout: ArchRepoClient._expect_message(
+                    stdout, "Package added successfully",
+                    "Package and signature uploaded and added to repository successfully.",
+                    "Package and signature uploaded but failed to add to repository."))
+
+        except Exception as e:
+            return False, f"Error during operation: {str(e)}"
+
+    async def remove_package(self, package_name: str) -> Tuple[bool, str]:
+        """
+        Remove a package from the repository.
+
+        Args:
+            package_name: Name of the package (without version info)
+
+        Returns:
+            Tuple of (success, message)
+        """
+        return await self._run_simple(f"remove {package_name} --json", "Failed to remove package",
+                                      ArchRepoClient._parse_remove_output)
+
+    async def list_packages(self) -> Tuple[bool, Union[List[Dict[str, str]], str]]:
+        """
+        List all packages in the repository.
+
+        Returns:
+            Tuple of (success, packages or error message), see ArchRepoClient.list_packages
+        """
+        return await self._run_simple("list --json", "Failed to list packages", ArchRepoClient._parse_list_output)
+
+    async def clean_repository(self) -> Tuple[bool, str]:
+        """
+        Clean the repository by removing old package versions.
+
+        Returns:
+            Tuple of (success, message)
+        """
+        return await self._run_simple("clean --json", "Failed to clean repository", ArchRepoClient._parse_clean_output)
+
+    async def get_status(self) -> Tuple[bool, Union[Dict[str, str], str]]:
+        """
+        Get repository status information.
+
+        Returns:
+            Tuple of (success, status_info or error message)
+        """
+        return await self._run_simple("status --json", "Failed to get repository status",
+                                      ArchRepoClient._parse_status_output)
+
+
+class AsyncArchRepoPool:
+    """
+    A fixed set of AsyncArchRepoClient connections shared by concurrent operations.
+
+    Sessions on one connection already run concurrently, but they share its
+    transport; spreading operations over several connections lets bulk uploads
+    use more than one encryption stream. Like ArchRepoPool, the useful size is
+    bounded by the server's MaxStartups/MaxSessions limits.
+    """
+
+    def __init__(self, host: str, size: int = 4, **connect_kwargs):
+        """
+        Initialize a new AsyncArchRepoPool instance.
+
+        Args:
+            host: SSH host
+            size: Number of connections, i.e. the maximum number of concurrent operations
+            connect_kwargs: Additional arguments for asyncssh.connect()
+        """
+        self.size = size
+        self.clients = [AsyncArchRepoClient(host, **connect_kwargs) for _ in range(size)]
+        self._idle = None
+        self._connect_lock = None
+
+    async def connect(self) -> None:
+        """
+        Open all connections, if they are not open yet.
+        """
+        # Concurrent calls on an unconnected pool must set up a single idle queue
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._idle is not None:
+                return
+
+            await asyncio.gather(*(client.connect() for client in self.clients))
+
+            # Created here, so that the queue belongs to the running event loop
+            idle = asyncio.Queue()
+            for client in self.clients:
+                idle.put_nowait(client)
+            self._idle = idle
+
+    async def close(self) -> None:
+        """
+        Close all connections.
+        """
+        await asyncio.gather(*(client.close() for client in self.clients))
+        self._idle = None
+
+    async def __aenter__(self) -> "AsyncArchRepoPool":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def call(self, method_name: str, *args) -> Any:
+        """
+        Call a client method on an idle connection, waiting for one to become available.
+
+        Args:
+            method_name: Name of the AsyncArchRepoClient method, e.g. "publish_package"
+            args: Arguments for the method
+
+        Returns:
+            The method's result
+        """
+        if self._idle is None:
+            await self.connect()
+
+        client = await self._idle.get()
+        try:
+            return await getattr(client, method_name)(*args)
+        finally:
+            self._idle.put_nowait(client)
+
+    async def map(self, method_name: str, iterable_of_args: Iterable) -> List[Any]:
+        """
+        Call a client method once for each set of arguments, concurrently.
+
+        Args:
+            method_name: Name of the AsyncArchRepoClient method, e.g. "publish_package"
+            iterable_of_args: Arguments for each call, either a tuple or a single value
+
+        Returns:
+            List of the results, in the order of the arguments
+        """
+        return await asyncio.gather(*(self.call(method_name, *(args if isinstance(args, tuple) else (args,)))
+                                      for args in iterable_of_args))
+
@@ -4,93 +4,647 @@ archrepo.py - Python API for managing an Arch Linux package repository
 """
 
 import argparse
-import base64
+import atexit
+import errno
 import os
+import shutil
 import subprocess
+import tempfile
 import sys
-from typing import List, Dict, Optional, Tuple, Union
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 import re
 import hashlib
+import json
+import shlex
+import itertools
+import mmap
+import queue
+import secrets
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows
+    fcntl = None
+
+# pybase64 provides SIMD-accelerated base64 with the same interface
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+
+# Ciphers in order of preference: AES-GCM is the fastest on CPUs with AES-NI,
+# the others are fallbacks for servers that do not offer it
+DEFAULT_CIPHERS = ",".join([
+    "aes128-gcm@openssh.com",
+    "aes256-gcm@openssh.com",
+    "chacha20-poly1305@openssh.com",
+    "aes128-ctr",
+    "aes256-ctr"
+])
+
+# Pipe buffer size for the ssh process (the Linux default is 64 KiB)
+DEFAULT_PIPE_BUF = 1 << 20
+
+# Only the end of the stderr output of a session is kept, error messages are short
+STDERR_TAIL_SIZE = 64 << 10
+
+# Files up to this size (e.g. signatures) are uploaded from memory after a single read
+SMALL_FILE_SIZE = 64 << 10
+
+# Patterns for parsing the shell output, compiled once
+# Result line printed by commands run with --json
+_JSON_RE = re.compile(r"^\{.*\}$", re.MULTILINE)
+# Header printed by "send-raw" before the file contents
+_SEND_RAW_RE = re.compile(rb"^-----START FILE DATA (\d+)-----\n$")
+# Result messages printed by the shell, found in a single scan of the output
+_STATUS_RE = re.compile(
+    r"Successfully received (?:signature )?file"
+    r"|Hash verification failed"
+    r"|Package added successfully"
+)
+
+
+def _status_messages(stdout: str) -> set:
+    """
+    Collect the result messages found in the shell output.
+    """
+    return {match.group(0) for match in _STATUS_RE.finditer(stdout)}
+
+
+def _json_result(stdout: str) -> Dict:
+    """
+    Decode the JSON result line of a command run with --json.
+
+    Returns:
+        The result, with "status" set to "ok" or "error"
+    """
+    lines = _JSON_RE.findall(stdout)
+    if not lines:
+        return {"status": "error", "message": "No result received"}
+
+    try:
+        return json.loads(lines[-1])
+    except ValueError:
+        return {"status": "error", "message": "Malformed result received"}
+
+
+class _OutputTail:
+    """
+    The last bytes of a pipe's output, collected by a background thread.
+
+    Memory use is bounded by the size limit, however much the other side writes.
+    """
+
+    def __init__(self, pipe, limit: int = STDERR_TAIL_SIZE):
+        """
+        Start collecting the output of a binary pipe.
+        """
+        self.limit = limit
+        self._data = bytearray()
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._drain, args=(pipe,), daemon=True)
+        self._reader.start()
+
+    def _drain(self, pipe) -> None:
+        """
+        Read the pipe until EOF, keeping only the last bytes.
+        """
+        # read1() returns whatever is available, so the tail stays current
+        read = getattr(pipe, "read1", pipe.read)
+        while True:
+            chunk = read(1 << 16)
+            if not chunk:
+                break
+            with self._lock:
+                self._data += chunk
+                del self._data[:-self.limit]
+        pipe.close()
+
+    def join(self) -> None:
+        """
+        Wait for the end of the output.
+        """
+        self._reader.join()
+
+    def take(self) -> str:
+        """
+        Return the collected output and start over.
+        """
+        with self._lock:
+            data = bytes(self._data)
+            self._data.clear()
+        return data.decode('utf-8', 'replace')
+
+
+def _prefetch(items: Iterable, depth: int = 2) -> Iterator:
+    """
+    Produce the items of an iterable in a background thread, up to depth items ahead.
+
+    Hashing and base64 encoding then overlap with writing the previous items to the
+    pipe, which releases the GIL while the data is copied into the kernel.
+
+    Args:
+        items: Iterable to consume in the background
+        depth: Maximum number of produced items waiting to be consumed
+
+    Yields:
+        The items, in order
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                buffer.put((True, item))
+                if stop.is_set():
+                    break
+        except Exception as e:
+            buffer.put((False, e))
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+            buffer.put((True, done))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            success, item = buffer.get()
+            if not success:
+                raise item
+            if item is done:
+                return
+            yield item
+    finally:
+        # Unblock the producer if the consumer stopped early
+        stop.set()
+        while producer.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _file_hash(file_path: str, digest: str) -> str:
+    """
+    Compute the hash of a file with the given algorithm.
+    """
+    with open(file_path, 'rb') as file:
+        # Python 3.11+ feeds the file to OpenSSL without an intermediate Python buffer
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(file, digest).hexdigest()
+
+        hasher = hashlib.new(digest)
+        for block in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(block)
+        return hasher.hexdigest()
 
 
 class ArchRepoClient:
-    def __init__(self, host: str):
+    def __init__(self, host: str, multiplex: bool = True, control_persist: int = 600,
+                 cipher: Optional[str] = DEFAULT_CIPHERS, pipe_buf: int = DEFAULT_PIPE_BUF,
+                 backend: str = "ssh", digest: str = "sha512", persistent: bool = False):
         """
         Initialize a new ArchRepoClient instance.
 
         Args:
             host: SSH host
+            multiplex: If True, all calls share a single SSH connection (ControlMaster)
+            control_persist: Seconds the shared connection stays open after the last call
+            cipher: Comma-separated list of SSH ciphers to offer, or None for the ssh defaults
+            pipe_buf: Size of the pipes to the ssh process (Linux only) and of their buffers in bytes,
+                      or 0 to keep the defaults
+            backend: "ssh" to run the ssh command, or "paramiko" to keep an in-process
+                     connection (requires paramiko; multiplex, cipher and pipe_buf do not apply)
+            digest: Hash for upload verification, "sha512" or "sha256"; SHA-256 is faster on CPUs
+                    with SHA extensions, but only servers from this version on accept it
+            persistent: If True, operations run in one shell session kept open until close(),
+                        instead of starting a new session for each operation
         """
+        if backend not in ("ssh", "paramiko"):
+            raise ValueError(f"Unknown backend: {backend}")
+        if digest not in ("sha512", "sha256"):
+            raise ValueError(f"Unsupported digest: {digest}")
+
         self.host = host
+        self.multiplex = multiplex
+        self.control_persist = control_persist
+        self.cipher = cipher
+        self.pipe_buf = pipe_buf
+        self._control_dir = None
+        self._control_path = None
+        self._ssh_argv = None
+        self.backend = backend
+        self._paramiko_client = None
+        self.digest = digest
+        self.persistent = persistent
+        self._session = None
+        self._close_at_exit = False
+
+    def _register_close(self) -> None:
+        """
+        Have close() run at interpreter exit, once, while a connection or session is open.
+        """
+        if not self._close_at_exit:
+            atexit.register(self.close)
+            self._close_at_exit = True
 
-    def _run_ssh_interactive(self, commands: List[str]) -> Tuple[int, str, str]:
+    def _ssh_args(self) -> List[str]:
         """
-        Execute commands in the custom shell via SSH.
+        Build the ssh command line for a new session.
 
-        This method handles the interactive shell by sending commands and then sending "exit"
-        to properly terminate the session.
+        When multiplexing is enabled, the first session becomes the ControlMaster
+        and all following sessions reuse its TCP connection and authentication.
+        The arguments are built once and reused until the connection is closed.
+
+        Returns:
+            List of ssh arguments ending with the host
+        """
+        if self._ssh_argv is not None:
+            return list(self._ssh_argv)
+
+        # Bulk transfers carry compressed packages, so SSH compression only costs CPU
+        ssh_args = ["ssh", "-o", "Compression=no"]
+
+        if self.cipher:
+            ssh_args += ["-c", self.cipher]
+
+        if self.multiplex:
+            if self._control_path is None:
+                self._control_dir = tempfile.mkdtemp(prefix="archrepo-")
+                self._control_path = os.path.join(self._control_dir, "cm-%r@%h:%p")
+                self._register_close()
+
+            ssh_args += [
+                "-o", "ControlMaster=auto",
+                "-o", f"ControlPath={self._control_path}",
+                "-o", f"ControlPersist={self.control_persist}"
+            ]
+
+        ssh_args.append(self.host)
+        self._ssh_argv = tuple(ssh_args)
+        return ssh_args
+
+    def close(self) -> None:
+        """
+        Shut down the shared SSH connection, if one has been established.
+        """
+        # Nothing is left to close at exit, and the client need not be kept alive for it
+        if self._close_at_exit:
+            atexit.unregister(self.close)
+            self._close_at_exit = False
+
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+        if self._paramiko_client is not None:
+            self._paramiko_client.close()
+            self._paramiko_client = None
+
+        if self._control_dir is None:
+            return
+
+        # The master only exists if at least one session has been opened
+        if os.listdir(self._control_dir):
+            subprocess.run(
+                ["ssh", "-O", "exit", "-o", f"ControlPath={self._control_path}", self.host],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+        shutil.rmtree(self._control_dir, ignore_errors=True)
+        self._control_dir = None
+        self._control_path = None
+        self._ssh_argv = None
+
+    def __enter__(self) -> "ArchRepoClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _open_session(self, remote_command: Optional[str] = None, text: bool = True) -> subprocess.Popen:
+        """
+        Start an ssh process with pipes for stdin, stdout and stderr.
+
+        With the paramiko backend, a channel of the in-process connection is opened
+        instead, behind the same stdin/stdout/stderr and wait() interface.
 
         Args:
-            commands: List of commands to execute
+            remote_command: Command to run instead of the interactive shell
+            text: If True, the pipes are opened in text mode
 
         Returns:
-            Tuple of (return_code, stdout, stderr)
+            The ssh process
         """
-        # Prepare the complete input for the SSH session
-        # Each command followed by a newline, and ending with 'exit'
-        input_data = "\n".join(commands + ["exit"]) + "\n"
+        if self.backend == "paramiko":
+            from .paramiko_backend import ParamikoSession, connect
 
-        ssh_args = [
-            "ssh",
-            self.host
-        ]
+            if self._paramiko_client is None:
+                self._paramiko_client = connect(self.host)
+                self._register_close()
+            return ParamikoSession(self._paramiko_client, remote_command, text)
+
+        ssh_args = self._ssh_args()
+        if remote_command is not None:
+            ssh_args.append(remote_command)
 
         process = subprocess.Popen(
             ssh_args,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            universal_newlines=True
+            # A buffer as large as the pipe lets line-by-line reads (downloads) fetch
+            # a whole pipe's worth of data per system call instead of 8 KiB
+            bufsize=self.pipe_buf or -1,
+            universal_newlines=text
         )
 
-        stdout, stderr = process.communicate(input=input_data)
-        return process.returncode, stdout, stderr
+        # Larger pipes mean fewer read/write round-trips for bulk transfers
+        if self.pipe_buf and fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
+            for pipe in (process.stdin, process.stdout):
+                try:
+                    fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, self.pipe_buf)
+                except (OSError, ValueError):
+                    # The size may exceed /proc/sys/fs/pipe-max-size, keep the default
+                    pass
+
+        return process
 
-    def _encode_and_send_file(self, commands: List[str], file_path: str, filename: str) -> List[str]:
+    def _run_ssh_interactive(self, commands: Iterable[Union[str, bytes, BinaryIO]]) -> Tuple[int, str, str]:
         """
-        Encode a file and add commands to send it to the server.
+        Execute commands in the custom shell via SSH.
+
+        This method handles the interactive shell by sending commands and then sending "exit"
+        to properly terminate the session. Commands are written to the session as they
+        are produced, so a generator can stream large payloads without holding them in memory.
 
         Args:
-            commands: The command list to append to
-            file_path: Path to the file to encode
-            filename: Name to use for the file on the server
+            commands: Iterable of commands to execute; str items are sent as lines, bytes
+                      items as they are (they must end with a newline), and open binary
+                      files as raw data (after "receive-raw")
 
         Returns:
-            Updated commands list
+            Tuple of (return_code, stdout, stderr)
+        """
+        if self.persistent:
+            if self._session is None:
+                self._session = _PersistentSession(self._open_session(text=False), self._write_commands)
+                self._register_close()
+
+            return_code, stdout, stderr = self._session.run(commands)
+            if return_code != 0:
+                # The session has ended, the next operation starts a new one
+                self._session = None
+            return return_code, stdout, stderr
+
+        process = self._open_session(text=False)
+
+        # Drain the output pipes in the background, so that the server never
+        # blocks on a full pipe while we are still writing its input
+        stdout_chunks = []
+        stdout_reader = threading.Thread(target=self._drain, args=(process.stdout, stdout_chunks), daemon=True)
+        stdout_reader.start()
+        stderr_tail = _OutputTail(process.stderr)
+
+        try:
+            # Each command followed by a newline, and ending with 'exit'
+            self._write_commands(process.stdin, itertools.chain(commands, ["exit"]))
+            process.stdin.close()
+        except BrokenPipeError:
+            # The session has ended early, its output tells why
+            pass
+
+        stdout_reader.join()
+        stderr_tail.join()
+        return_code = process.wait()
+
+        stdout = b"".join(stdout_chunks).decode('utf-8', 'replace')
+        return return_code, stdout, stderr_tail.take()
+
+    def _write_commands(self, stdin, commands: Iterable[Union[str, bytes, BinaryIO]]) -> None:
+        """
+        Write commands to the binary stdin of a session (see _run_ssh_interactive).
+        """
+        for command in commands:
+            if isinstance(command, str):
+                stdin.write(command.encode('utf-8'))
+                stdin.write(b"\n")
+            elif isinstance(command, bytes):
+                # Already formatted lines, written without another copy
+                stdin.write(command)
+            else:
+                # Raw file contents, their length is part of the preceding command
+                self._write_file(command, stdin)
+
+    @staticmethod
+    def _drain(pipe, chunks: list) -> None:
+        """
+        Read a pipe until EOF, collecting the data into chunks.
+        """
+        while True:
+            chunk = pipe.read(1 << 20)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        pipe.close()
+
+    @staticmethod
+    @contextmanager
+    def _map_file(file_path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+        """
+        Memory-map a file for reading.
+
+        The kernel pages the file in as it is accessed, so slicing the map reads
+        only the requested part of the file into memory.
+
+        Args:
+            file_path: Path to the file to map
+
+        Yields:
+            The read-only map, or empty bytes for an empty file
         """
-        # Base64 encode the file
         with open(file_path, 'rb') as file:
-            file_data = file.read()
+            # Empty files cannot be memory-mapped
+            if os.fstat(file.fileno()).st_size == 0:
+                yield b""
+                return
 
-        # Calculate SHA-512 hash
-        file_hash = hashlib.sha512(file_data).hexdigest()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                yield mapped_file
 
-        encoded_data = base64.b64encode(file_data).decode('utf-8')
+    def _encode_and_send_file(self, file_path: str, filename: str) -> Iterator[Union[str, bytes]]:
+        """
+        Generate the commands that send a file to the server.
 
-        # Add receive command with hash
-        commands.append(f"receive {filename} {file_hash}")
+        The file is memory-mapped once: the hash required by the "receive" command is
+        computed over the whole map, then the base64 encoding is streamed one window
+        at a time, so memory use does not depend on the file size.
 
-        # Add the base64 data in chunks to avoid line length issues
-        chunk_size = 76  # Standard base64 line length
-        for i in range(0, len(encoded_data), chunk_size):
-            commands.append(encoded_data[i:i+chunk_size])
+        Args:
+            file_path: Path to the file to encode
+            filename: Name to use for the file on the server
+
+        Yields:
+            The "receive" command, blocks of base64 lines and the end of file marker
+        """
+        # 57 raw bytes encode to exactly one standard 76-character base64 line,
+        # so windows of a multiple of 57 bytes (about 1 MiB) encode to whole lines
+        line_size = 57
+        window_size = line_size * ((1 << 20) // line_size)
+
+        with self._map_file(file_path) as mapped_file:
+            # Calculate the hash straight from the map, without copying the file
+            # (OpenSSL uses the SHA extensions of the CPU, if available)
+            hasher = hashlib.new(self.digest)
+            hasher.update(mapped_file)
+
+            # Add receive command with hash
+            yield f"receive {filename} {hasher.hexdigest()}"
+
+            # Send the base64 data in lines to avoid line length issues: encodebytes
+            # splits a whole window into newline-terminated 76-character lines at once,
+            # so each window goes to the pipe as a single write of its encoding.
+            # Windows are memoryview slices, so they are encoded straight from the map
+            with memoryview(mapped_file) as view:
+                for offset in range(0, len(view), window_size):
+                    yield base64.encodebytes(view[offset:offset + window_size])
 
         # End of file marker
-        commands.append("EOF")
+        yield "EOF"
+
+    def _send_raw_file(self, file_path: str, filename: str) -> Iterator[Union[str, BinaryIO]]:
+        """
+        Generate the commands that send a file to the server as raw bytes.
 
-        return commands
+        The "receive-raw" command announces the size, so the shell reads exactly
+        that many bytes from the session and then continues with the next command.
 
-    def publish_package(self, package_path: str, no_signing: bool = False) -> Tuple[bool, str]:
+        Args:
+            file_path: Path to the file to send
+            filename: Name to use for the file on the server
+
+        Yields:
+            The "receive-raw" command and the open file, or the contents of a small file
+        """
+        file_size = os.path.getsize(file_path)
+
+        if file_size <= SMALL_FILE_SIZE:
+            # Hash and send the contents of one read, instead of opening the file twice
+            with open(file_path, 'rb') as file:
+                data = file.read()
+            hasher = hashlib.new(self.digest, data)
+            yield f"receive-raw {shlex.quote(filename)} {len(data)} {hasher.hexdigest()}"
+            yield data
+            return
+
+        yield f"receive-raw {shlex.quote(filename)} {file_size} {self._hash_file(file_path)}"
+
+        with open(file_path, 'rb') as file:
+            yield file
+
+    def _hash_file(self, file_path: str) -> str:
+        """
+        Compute the hash of a file with the client's digest algorithm.
+        """
+        return _file_hash(file_path, self.digest)
+
+    def upload_raw(self, file_path: str, filename: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Upload a file to the server as raw bytes, without base64 encoding.
+
+        The file is piped into a separate "receive-raw" session, which is cheap to
+        open over the shared connection. To upload several files in one session,
+        publish_package(raw=True) sends them in-band instead.
+
+        Args:
+            file_path: Path to the file to upload
+            filename: Name to use for the file on the server (defaults to the file's basename)
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if not os.path.isfile(file_path):
+            return False, f"File not found: {file_path}"
+
+        if filename is None:
+            filename = os.path.basename(file_path)
+
+        file_size = os.path.getsize(file_path)
+
+        # The hash is part of the command line, so it is computed beforehand
+        process = self._open_session(
+            f"receive-raw {shlex.quote(filename)} {file_size} {self._hash_file(file_path)}", text=False)
+
+        try:
+            with open(file_path, 'rb') as file:
+                self._write_file(file, process.stdin)
+        except BrokenPipeError:
+            # The session has ended early, its output tells why
+            pass
+
+        stdout, stderr = process.communicate()
+        stdout = stdout.decode('utf-8', 'replace')
+        stderr = stderr.decode('utf-8', 'replace')
+
+        messages = _status_messages(stdout)
+        if process.returncode != 0 or not {"Successfully received file",
+                                           "Successfully received signature file"} & messages:
+            return False, f"Failed to upload {filename}: {stderr or stdout}"
+
+        return True, f"File {filename} uploaded successfully."
+
+    def _write_file(self, file: BinaryIO, stdin) -> None:
+        """
+        Copy the rest of a file into the stdin of a session.
+        """
+        if self.backend == "ssh":
+            self._copy_to_pipe(file, stdin)
+        else:
+            # Channels of the paramiko backend have no file descriptor to sendfile() into
+            shutil.copyfileobj(file, stdin, 1 << 20)
+
+    @staticmethod
+    def _copy_to_pipe(file, pipe) -> None:
+        """
+        Copy the rest of a file into a pipe.
+
+        On Linux the data is moved with sendfile(), so it goes from the page cache
+        into the pipe without passing through user space.
+
+        Args:
+            file: Binary file object to read from
+            pipe: Binary pipe object to write to
+        """
+        if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+            pipe.flush()
+            offset = file.tell()
+            size = os.fstat(file.fileno()).st_size
+            try:
+                while offset < size:
+                    sent = os.sendfile(pipe.fileno(), file.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError as e:
+                if e.errno not in (errno.EINVAL, errno.ENOSYS):
+                    raise
+                # Not supported for this file, continue in user space
+                file.seek(offset)
+
+        shutil.copyfileobj(file, pipe, 1 << 20)
+
+    def publish_package(self, package_path: str, no_signing: bool = False, raw: bool = True) -> Tuple[bool, str]:
         """
         Publish a package to the repository (upload and add in a single operation).
         Also uploads the .sig signature file if it exists and no_signing is False.
@@ -98,6 +652,8 @@ class ArchRepoClient:
         Args:
             package_path: Path to the package file
             no_signing: If True, signature check will be skipped
+            raw: If True, upload the files as raw bytes with "receive-raw"; if False, as base64
+                 with "receive" (for servers without "receive-raw")
 
         Returns:
             Tuple of (success, message)
@@ -116,40 +672,45 @@ class ArchRepoClient:
         if not signature_exists and not no_signing:
             return False, f"Signature file not found: {signature_path}. Use --no-signing to skip signature check."
 
-        try:
-            # Prepare the commands list
-            commands = []
+        send_file = self._send_raw_file if raw else self._encode_and_send_file
 
+        try:
             # Send the package file
-            commands = self._encode_and_send_file(commands, package_path, filename)
+            commands = [send_file(package_path, filename)]
 
             # If we have a signature and signing is required, send it too
             if signature_exists and not no_signing:
                 signature_filename = f"{filename}.sig"
-                commands = self._encode_and_send_file(commands, signature_path, signature_filename)
+                commands.append(send_file(signature_path, signature_filename))
 
             # Add the package to the repo
-            commands.append(f"add {filename}")
+            commands.append([f"add {filename}"])
 
-            # Run the commands interactively
+            commands = itertools.chain.from_iterable(commands)
+            if not raw:
+                # Encode the next window in the background while the current one is written
+                commands = _prefetch(commands)
+
+            # Run the commands interactively, streaming the file contents
             return_code, stdout, stderr = self._run_ssh_interactive(commands)
 
             if return_code != 0:
                 return False, f"Operation failed: {stderr}"
 
             # Success messages to look for
-            pkg_received = "File received successfully" in stdout
-            hash_verified = "SHA-512 hash verification: SUCCESS" in stdout or "SHA-512 hash verification" not in stdout
+            messages = _status_messages(stdout)
+            pkg_received = "Successfully received file" in messages
+            hash_verified = "Hash verification failed" not in messages
             sig_received = True  # Assume true initially
 
             # If we sent a signature, check it was received
             if signature_exists and not no_signing:
-                sig_received = "Signature file received successfully" in stdout
+                sig_received = "Successfully received signature file" in messages
 
-            pkg_added = "Package added successfully" in stdout
+            pkg_added = "Package added successfully" in messages
 
             if not hash_verified:
-                return False, "Package upload failed: SHA-512 hash verification failed."
+                return False, f"Package upload failed: {self.digest.upper()} hash verification failed."
             elif pkg_received and sig_received and pkg_added:
                 return True, "Package and signature uploaded and added to repository successfully."
             elif pkg_received and sig_received:
@@ -162,6 +723,215 @@ class ArchRepoClient:
         except Exception as e:
             return False, f"Error during operation: {str(e)}"
 
+    def publish_packages(self, package_paths: List[str], no_signing: bool = False,
+                         raw: bool = True) -> Tuple[bool, str]:
+        """
+        Publish several packages at once: all files are uploaded in one session and
+        added with a single "add" command, so the repository database is rewritten once.
+
+        Args:
+            package_paths: Paths to the package files
+            no_signing: If True, signature check will be skipped
+            raw: If True, upload the files as raw bytes; if False, as base64 (see publish_package)
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if not package_paths:
+            return False, "No package files specified"
+
+        uploads = []
+        filenames = []
+        for package_path in package_paths:
+            if not os.path.isfile(package_path):
+                return False, f"Package file not found: {package_path}"
+
+            filename = os.path.basename(package_path)
+            signature_path = f"{package_path}.sig"
+            signature_exists = os.path.isfile(signature_path)
+
+            if not signature_exists and not no_signing:
+                return False, f"Signature file not found: {signature_path}. Use --no-signing to skip signature check."
+
+            uploads.append((package_path, filename))
+            if signature_exists and not no_signing:
+                uploads.append((signature_path, f"{filename}.sig"))
+            filenames.append(filename)
+
+        send_file = self._send_raw_file if raw else self._encode_and_send_file
+
+        try:
+            commands = [send_file(path, filename) for path, filename in uploads]
+            commands.append([f"add {' '.join(filenames)} --json"])
+
+            commands = itertools.chain.from_iterable(commands)
+            if not raw:
+                commands = _prefetch(commands)
+
+            return_code, stdout, stderr = self._run_ssh_interactive(commands)
+
+            if return_code != 0:
+                return False, f"Operation failed: {stderr}"
+
+            if "Hash verification failed" in _status_messages(stdout):
+                return False, f"Package upload failed: {self.digest.upper()} hash verification failed."
+
+            received = sum(1 for match in _STATUS_RE.finditer(stdout) if match.group(0).startswith("Successfully"))
+            if received < len(uploads):
+                return False, "Upload failed: Files not received successfully."
+
+            result = _json_result(stdout)
+            if result["status"] != "ok":
+                return False, f"Packages uploaded but failed to add to repository: {result['message']}"
+
+            return True, f"{len(filenames)} packages uploaded and added to repository successfully."
+
+        except Exception as e:
+            return False, f"Error during operation: {str(e)}"
+
+    def download_package(self, package_filename: str, output_path: Optional[str] = None,
+                         raw: bool = True) -> Tuple[bool, str]:
+        """
+        Download a package file from the repository.
+
+        The data sent by the server is written straight into the output file as it
+        arrives, so memory use does not depend on the package size.
+
+        Args:
+            package_filename: Name of the file in the repository (e.g. name-1.0-1-x86_64.pkg.tar.zst)
+            output_path: Where to save the file (defaults to package_filename in the current directory)
+            raw: If True, receive the file as raw bytes with "send-raw"; if False, as base64
+                 with "send" (for servers without "send-raw")
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if output_path is None:
+            output_path = os.path.basename(package_filename)
+
+        if raw:
+            process = self._open_session(f"send-raw {shlex.quote(package_filename)}", text=False)
+            receive = self._receive_raw
+        else:
+            process = self._open_session(text=False)
+            receive = self._receive_base64
+
+        stderr_tail = _OutputTail(process.stderr)
+
+        try:
+            if not raw:
+                process.stdin.write(f"send {package_filename}\nexit\n".encode('utf-8'))
+            process.stdin.close()
+        except BrokenPipeError:
+            # The session has ended early, its output tells why
+            pass
+
+        complete = False
+        error = None
+        try:
+            with open(output_path, 'wb') as output_file:
+                complete = receive(process.stdout, output_file)
+        except Exception as e:
+            complete = False
+            error = e
+        finally:
+            # Consume the rest of the session output, so that ssh can exit; after an
+            # error this may be most of the file, so it is discarded chunk by chunk
+            while process.stdout.read(1 << 20):
+                pass
+            process.stdout.close()
+            stderr_tail.join()
+            return_code = process.wait()
+
+            if not complete and os.path.exists(output_path):
+                os.unlink(output_path)
+
+        if error is not None:
+            return False, f"Error during operation: {str(error)}"
+
+        # The shell reports a missing file on stdout, so an empty stderr is not a reason
+        stderr = stderr_tail.take()
+        if return_code != 0 and stderr:
+            return False, f"Failed to download package: {stderr}"
+
+        if not complete:
+            return False, f"Failed to download package: {package_filename} was not received completely."
+
+        return True, f"Package downloaded successfully to {output_path}."
+
+    @staticmethod
+    def _receive_base64(stdout, output_file) -> bool:
+        """
+        Decode the base64 lines printed by "send" into a file, one line at a time.
+
+        Returns:
+            True if the end of the data has been reached
+        """
+        in_data = False
+        for line in stdout:
+            if not in_data:
+                in_data = line == b"-----START FILE DATA-----\n"
+            elif line == b"-----END FILE DATA-----\n":
+                return True
+            else:
+                output_file.write(base64.b64decode(line))
+        return False
+
+    @staticmethod
+    def _receive_raw(stdout, output_file) -> bool:
+        """
+        Copy the raw bytes sent by "send-raw" into a file.
+
+        The header announces the size, which is then read into one reused buffer,
+        so no objects are allocated per chunk.
+
+        Returns:
+            True if the announced number of bytes has been received
+        """
+        for line in stdout:
+            match = _SEND_RAW_RE.match(line)
+            if match is None:
+                continue
+
+            remaining = int(match.group(1))
+            buffer = memoryview(bytearray(1 << 20))
+            while remaining:
+                count = stdout.readinto(buffer[:min(remaining, len(buffer))])
+                if not count:
+                    break
+                output_file.write(buffer[:count])
+                remaining -= count
+            return remaining == 0
+        return False
+
+    def _run_simple(self, command: str, error_prefix: str, parser: Callable[[str], tuple]) -> tuple:
+        """
+        Run a single shell command and interpret its output.
+
+        Args:
+            command: Command to execute
+            error_prefix: Message to report, followed by stderr, if the session fails
+            parser: Function turning the command output into a (success, result) tuple
+
+        Returns:
+            Tuple of (success, result or error message)
+        """
+        return_code, stdout, stderr = self._run_ssh_interactive([command])
+
+        if return_code != 0:
+            return False, f"{error_prefix}: {stderr}"
+
+        return parser(stdout)
+
+    @staticmethod
+    def _expect_message(stdout: str, success_message: str, ok_msg: str, fail_msg: str) -> Tuple[bool, str]:
+        """
+        Report success if the shell printed the given result message.
+        """
+        if success_message in _status_messages(stdout):
+            return True, ok_msg
+        return False, fail_msg
+
     def remove_package(self, package_name: str) -> Tuple[bool, str]:
         """
         Remove a package from the repository.
@@ -172,15 +942,18 @@ class ArchRepoClient:
         Returns:
             Tuple of (success, message)
         """
-        return_code, stdout, stderr = self._run_ssh_interactive([f"remove {package_name}"])
+        return self._run_simple(f"remove {package_name} --json", "Failed to remove package",
+                                self._parse_remove_output)
 
-        if return_code != 0:
-            return False, f"Failed to remove package: {stderr}"
-
-        if "Package removed successfully" in stdout:
-            return True, "Package removed from repository successfully."
-        else:
-            return False, "Failed to remove package from repository."
+    @staticmethod
+    def _parse_remove_output(stdout: str) -> Tuple[bool, str]:
+        """
+        Interpret the shell output of a "remove --json" command.
+        """
+        result = _json_result(stdout)
+        if result["status"] != "ok":
+            return False, f"Failed to remove package from repository: {result['message']}"
+        return True, "Package removed from repository successfully."
 
     def list_packages(self) -> Tuple[bool, Union[List[Dict[str, str]], str]]:
         """
@@ -193,27 +966,17 @@ class ArchRepoClient:
                 - version: Package version
                 - description: Package description
         """
-        return_code, stdout, stderr = self._run_ssh_interactive(["list"])
+        return self._run_simple("list --json", "Failed to list packages", self._parse_list_output)
 
-        if return_code != 0:
-            return False, f"Failed to list packages: {stderr}"
-
-        packages = []
-        for line in stdout.splitlines():
-            # Parse the output of pacman -Sl custom
-            if line.startswith("custom "):
-                parts = line.split()
-                if len(parts) >= 4:
-                    # Format is typically: custom package_name version description
-                    repo, name, version = parts[0:3]
-                    description = " ".join(parts[3:])
-                    packages.append({
-                        "name": name,
-                        "version": version,
-                        "description": description
-                    })
-
-        return True, packages
+    @staticmethod
+    def _parse_list_output(stdout: str) -> Tuple[bool, Union[List[Dict[str, str]], str]]:
+        """
+        Interpret the shell output of a "list --json" command.
+        """
+        result = _json_result(stdout)
+        if result["status"] != "ok":
+            return False, f"Failed to list packages: {result['message']}"
+        return True, result["packages"]
 
     def clean_repository(self) -> Tuple[bool, str]:
         """
@@ -222,20 +985,17 @@ class ArchRepoClient:
         Returns:
             Tuple of (success, message)
         """
-        return_code, stdout, stderr = self._run_ssh_interactive(["clean"])
+        return self._run_simple("clean --json", "Failed to clean repository", self._parse_clean_output)
 
-        if return_code != 0:
-            return False, f"Failed to clean repository: {stderr}"
-
-        if "Repository cleaned successfully" in stdout:
-            # Extract the number of removed packages if available
-            match = re.search(r"Removed (\d+) old package versions", stdout)
-            if match:
-                count = match.group(1)
-                return True, f"Repository cleaned successfully. Removed {count} old package versions."
-            return True, "Repository cleaned successfully."
-        else:
-            return False, "Failed to clean repository."
+    @staticmethod
+    def _parse_clean_output(stdout: str) -> Tuple[bool, str]:
+        """
+        Interpret the shell output of a "clean --json" command.
+        """
+        result = _json_result(stdout)
+        if result["status"] != "ok":
+            return False, f"Failed to clean repository: {result['message']}"
+        return True, f"Repository cleaned successfully. Removed {result['removed']} old package versions."
 
     def get_status(self) -> Tuple[bool, Union[Dict[str, str], str]]:
         """
@@ -244,20 +1004,183 @@ class ArchRepoClient:
         Returns:
             Tuple of (success, status_info or error message)
         """
-        return_code, stdout, stderr = self._run_ssh_interactive(["status"])
+        return self._run_simple("status --json", "Failed to get repository status", self._parse_status_output)
 
-        if return_code != 0:
-            return False, f"Failed to get repository status: {stderr}"
+    @staticmethod
+    def _parse_status_output(stdout: str) -> Tuple[bool, Union[Dict[str, str], str]]:
+        """
+        Interpret the shell output of a "status --json" command.
+        """
+        result = _json_result(stdout)
+        if result["status"] != "ok":
+            return False, f"Failed to get repository status: {result['message']}"
+        return True, result["info"]
 
-        status_info = {}
+    @contextmanager
+    def batch(self) -> Iterator["Batch"]:
+        """
+        Run several operations in a single SSH session.
+
+        Operations queued on the yielded Batch are sent together when the
+        with-block exits; their results are then available in Batch.results,
+        in the order the operations were queued:
 
-        # Parse the output to extract status information
-        for line in stdout.splitlines():
-            if ":" in line:
-                key, value = [x.strip() for x in line.split(":", 1)]
-                status_info[key] = value
+            with client.batch() as batch:
+                batch.list_packages()
+                batch.get_status()
+            (ok, packages), (ok, status) = batch.results
+
+        Yields:
+            Batch collecting the operations
+        """
+        batch = Batch(self)
+        yield batch
+        batch.flush()
+
+
+class _PersistentSession:
+    """
+    A shell session kept open across operations.
+
+    After the commands of each operation, the shell is asked to echo a sentinel
+    line that cannot appear in regular output; everything read before it is the
+    operation's output. A background thread reads the output line by line, so the
+    shell never blocks on a full pipe while commands are still being written.
+    """
+
+    def __init__(self, process, write_commands: Callable):
+        """
+        Args:
+            process: Session process with binary pipes, as returned by _open_session
+            write_commands: Function writing commands to the session's stdin
+        """
+        self.process = process
+        self._write_commands = write_commands
+        self._nonce = secrets.token_hex(8)
+        self._count = 0
+
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_lines, daemon=True).start()
+        self._stderr_tail = _OutputTail(process.stderr)
+
+    def _read_lines(self) -> None:
+        """
+        Queue the output lines of the session, followed by None at EOF.
+        """
+        for line in iter(self.process.stdout.readline, b""):
+            self._lines.put(line.decode('utf-8', 'replace'))
+        self._lines.put(None)
+
+    def run(self, commands: Iterable[Union[str, bytes, BinaryIO]]) -> Tuple[int, str, str]:
+        """
+        Execute commands and collect their output up to the sentinel.
+
+        Returns:
+            Tuple of (return_code, stdout, stderr); the return code is non-zero
+            if the session has ended before printing the sentinel
+        """
+        self._count += 1
+        sentinel = f"===END {self._nonce} {self._count}==="
+
+        try:
+            self._write_commands(self.process.stdin, itertools.chain(commands, [f"echo {sentinel}"]))
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            # The session has ended early, its output tells why
+            pass
+
+        stdout_lines = []
+        for line in iter(self._lines.get, None):
+            if line.rstrip("\n") == sentinel:
+                return 0, "".join(stdout_lines), self._stderr_tail.take()
+            stdout_lines.append(line)
+
+        # 255 is what ssh reports for a lost connection
+        return_code = self.process.wait() or 255
+        self._stderr_tail.join()
+        return return_code, "".join(stdout_lines), self._stderr_tail.take()
+
+    def close(self) -> None:
+        """
+        End the session by closing its input.
+        """
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+
+
+class Batch:
+    """
+    Operations queued for execution in a single SSH session.
+
+    The output of each command is delimited by an "echo" marker, so it can be
+    handed to the same parser the corresponding ArchRepoClient method uses.
+    """
+
+    MARKER_RE = re.compile(r"^===MARK (\d+)===$", re.MULTILINE)
+
+    def __init__(self, client: ArchRepoClient):
+        self.client = client
+        self.results = []
+        self._ops = []
+
+    def _queue(self, op_name: str, command: str, parser: Callable[[str], tuple]) -> None:
+        self._ops.append((op_name, command, parser))
+
+    def remove_package(self, package_name: str) -> None:
+        """Queue removal of a package, see ArchRepoClient.remove_package"""
+        self._queue("remove", f"remove {package_name} --json", ArchRepoClient._parse_remove_output)
+
+    def list_packages(self) -> None:
+        """Queue a package listing, see ArchRepoClient.list_packages"""
+        self._queue("list", "list --json", ArchRepoClient._parse_list_output)
+
+    def clean_repository(self) -> None:
+        """Queue a repository cleanup, see ArchRepoClient.clean_repository"""
+        self._queue("clean", "clean --json", ArchRepoClient._parse_clean_output)
+
+    def get_status(self) -> None:
+        """Queue a status query, see ArchRepoClient.get_status"""
+        self._queue("status", "status --json", ArchRepoClient._parse_status_output)
+
+    def flush(self) -> List[tuple]:
+        """
+        Send all queued operations in one SSH session and parse their output.
+
+        Returns:
+            List of (success, result) tuples, one per queued operation
+        """
+        ops, self._ops = self._ops, []
+        if not ops:
+            return self.results
+
+        commands = []
+        for index, (op_name, command, parser) in enumerate(ops):
+            commands.append(f"echo ===MARK {index}===")
+            commands.append(command)
+
+        return_code, stdout, stderr = self.client._run_ssh_interactive(commands)
+
+        if return_code != 0:
+            self.results += [(False, f"Failed to run batched {op_name}: {stderr}")
+                             for op_name, command, parser in ops]
+            return self.results
+
+        # re.split yields [preamble, index, output, index, output, ...]
+        sections = self.MARKER_RE.split(stdout)
+        outputs = dict(zip(sections[1::2], sections[2::2]))
+
+        for index, (op_name, command, parser) in enumerate(ops):
+            output = outputs.get(str(index))
+            if output is None:
+                self.results.append((False, f"No output received for batched {op_name}"))
+            else:
+                self.results.append(parser(output))
+
+        return self.results
 
-        return True, status_info
 
 def main():
     """
@@ -266,19 +1189,33 @@ def main():
     parser = argparse.ArgumentParser(description="ArchRepo Client API")
 
     parser.add_argument("-H", "--host", help="SSH host as specified in ~/.ssh/config")
+    parser.add_argument("--no-multiplex", action="store_true",
+                        help="Do not share one SSH connection between sessions")
+    parser.add_argument("--backend", choices=["ssh", "paramiko"], default="ssh",
+                        help="Run the ssh command, or keep an in-process connection with paramiko")
 
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
 
     # Publish command (upload and add)
     publish_parser = subparsers.add_parser("publish", help="Publish a package (upload and add to repository)")
-    publish_parser.add_argument("package_file", help="Package file to publish")
+    publish_parser.add_argument("package_file", nargs="+",
+                                help="Package file to publish; several files are added to the repository at once")
     publish_parser.add_argument("--no-signing", action="store_true", help="Skip signature check for this package")
+    publish_parser.add_argument("--base64", action="store_true",
+                                help="Upload files as base64 instead of raw bytes (for older servers)")
 
     # Remove command
     remove_parser = subparsers.add_parser("remove", help="Remove a package")
     remove_parser.add_argument("package_name", help="Package name to remove")
 
+    # Download command
+    download_parser = subparsers.add_parser("download", help="Download a package file from the repository")
+    download_parser.add_argument("package_file", help="Package file name in the repository")
+    download_parser.add_argument("-o", "--output", help="Output path (defaults to the package file name)")
+    download_parser.add_argument("--base64", action="store_true",
+                                 help="Receive the file as base64 instead of raw bytes (for older servers)")
+
     # List command
     subparsers.add_parser("list", help="List all packages")
 
@@ -296,12 +1233,17 @@ def main():
 
     try:
         # Create client instance
-        client = ArchRepoClient(host=args.host)
+        client = ArchRepoClient(host=args.host, multiplex=not args.no_multiplex, backend=args.backend)
 
         # Execute requested command
         if args.command == "publish":
             no_signing = getattr(args, "no_signing", False)
-            success, message = client.publish_package(args.package_file, no_signing=no_signing)
+            if len(args.package_file) == 1:
+                success, message = client.publish_package(args.package_file[0], no_signing=no_signing,
+                                                          raw=not args.base64)
+            else:
+                success, message = client.publish_packages(args.package_file, no_signing=no_signing,
+                                                           raw=not args.base64)
             print(message)
             return 0 if success else 1
 
@@ -310,6 +1252,12 @@ def main():
             print(message)
             return 0 if success else 1
 
+        elif args.command == "download":
+            success, message = client.download_package(args.package_file, output_path=args.output,
+                                                       raw=not args.base64)
+            print(message)
+            return 0 if success else 1
+
         elif args.command == "list":
             success, result = client.list_packages()
             if success:
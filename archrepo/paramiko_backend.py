@@ -0,0 +1,130 @@
+"""
+paramiko_backend.py - In-process SSH sessions for ArchRepoClient using paramiko
+"""
+
+import io
+import os
+import threading
+from typing import Optional
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+
+def connect(host: str) -> "paramiko.SSHClient":
+    """
+    Open an authenticated SSH connection, honouring ~/.ssh/config like the ssh command.
+
+    Args:
+        host: SSH host, possibly a Host entry of ~/.ssh/config
+
+    Returns:
+        Connected paramiko.SSHClient
+    """
+    if paramiko is None:
+        raise ImportError("The paramiko backend requires the paramiko package (pip install archrepo[paramiko])")
+
+    host_config = {}
+    config_path = os.path.expanduser("~/.ssh/config")
+    if os.path.isfile(config_path):
+        host_config = paramiko.SSHConfig.from_path(config_path).lookup(host)
+
+    client = paramiko.SSHClient()
+    client.load_system_host_keys()
+    client.connect(
+        host_config.get("hostname", host),
+        port=int(host_config.get("port", 22)),
+        username=host_config.get("user"),
+        key_filename=host_config.get("identityfile")
+    )
+    return client
+
+
+class _ChannelReader(io.RawIOBase):
+    """Raw stream reading the stdout or stderr of a channel"""
+
+    def __init__(self, recv):
+        self._recv = recv
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._recv(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class _ChannelWriter(io.RawIOBase):
+    """Raw stream writing the stdin of a channel; closing it sends EOF"""
+
+    def __init__(self, channel):
+        self._channel = channel
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._channel.send(data)
+
+    def close(self):
+        if not self.closed:
+            self._channel.shutdown_write()
+        super().close()
+
+
+class ParamikoSession:
+    """
+    Popen-like wrapper around a session channel of a paramiko connection.
+
+    It provides the stdin/stdout/stderr pipes, wait() and communicate() used by
+    ArchRepoClient, so the same code drives both the ssh command and paramiko.
+    """
+
+    def __init__(self, client: "paramiko.SSHClient", remote_command: Optional[str] = None, text: bool = True):
+        """
+        Open a new session, running either the remote command or the login shell.
+
+        Args:
+            client: Connected paramiko.SSHClient
+            remote_command: Command to run instead of the interactive shell
+            text: If True, the pipes are opened in text mode
+        """
+        self._channel = client.get_transport().open_session()
+        if remote_command is None:
+            self._channel.invoke_shell()
+        else:
+            self._channel.exec_command(remote_command)
+
+        self.returncode = None
+        self.stdin = self._wrap(io.BufferedWriter(_ChannelWriter(self._channel), 1 << 20), text)
+        self.stdout = self._wrap(io.BufferedReader(_ChannelReader(self._channel.recv), 1 << 20), text)
+        self.stderr = self._wrap(io.BufferedReader(_ChannelReader(self._channel.recv_stderr)), text)
+
+    @staticmethod
+    def _wrap(stream, text):
+        return io.TextIOWrapper(stream, encoding="utf-8", errors="replace") if text else stream
+
+    def wait(self) -> int:
+        """Wait for the session to end and return its exit status"""
+        self.returncode = self._channel.recv_exit_status()
+        return self.returncode
+
+    def communicate(self):
+        """Close stdin, read stdout and stderr until EOF and wait for the session to end"""
+        try:
+            self.stdin.close()
+        except OSError:
+            pass
+
+        # Both streams share the channel window, so they are read concurrently
+        stderr = []
+        stderr_reader = threading.Thread(target=lambda: stderr.append(self.stderr.read()), daemon=True)
+        stderr_reader.start()
+        stdout = self.stdout.read()
+        stderr_reader.join()
+
+        self.wait()
+        return stdout, stderr[0]
@@ -0,0 +1,91 @@
+"""
+pool.py - Run independent repository operations concurrently
+"""
+
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, List
+
+from .api import ArchRepoClient
+
+
+class ArchRepoPool:
+    """
+    A fixed set of ArchRepoClient instances for running operations in parallel.
+
+    Each client keeps its own multiplexed SSH connection, so N uploads can run at
+    the same time without authenticating again for every operation. The useful
+    pool size is bounded by the server: OpenSSH limits concurrent unauthenticated
+    connections with MaxStartups and sessions per connection with MaxSessions,
+    Dropbear has compile-time limits of the same kind.
+    """
+
+    def __init__(self, host: str, size: int = 4, **client_kwargs):
+        """
+        Initialize a new ArchRepoPool instance.
+
+        Args:
+            host: SSH host
+            size: Number of clients, i.e. the maximum number of concurrent operations
+            client_kwargs: Additional arguments for each ArchRepoClient
+        """
+        self.size = size
+        self.clients = [ArchRepoClient(host, **client_kwargs) for _ in range(size)]
+
+        self._idle = queue.Queue()
+        for client in self.clients:
+            self._idle.put(client)
+
+        self._executor = ThreadPoolExecutor(max_workers=size)
+
+    def _call(self, method_name: str, args: tuple) -> Any:
+        """
+        Call a method on an idle client, waiting for one to become available.
+        """
+        client = self._idle.get()
+        try:
+            return getattr(client, method_name)(*args)
+        finally:
+            self._idle.put(client)
+
+    def submit(self, method_name: str, *args) -> Future:
+        """
+        Schedule a single client method call.
+
+        Args:
+            method_name: Name of the ArchRepoClient method, e.g. "publish_package"
+            args: Arguments for the method
+
+        Returns:
+            Future resolving to the method's result
+        """
+        return self._executor.submit(self._call, method_name, args)
+
+    def map(self, method_name: str, iterable_of_args: Iterable) -> List[Any]:
+        """
+        Call a client method once for each set of arguments, concurrently.
+
+        Args:
+            method_name: Name of the ArchRepoClient method, e.g. "publish_package"
+            iterable_of_args: Arguments for each call, either a tuple or a single value
+
+        Returns:
+            List of the results, in the order of the arguments
+        """
+        futures = [self.submit(method_name, *(args if isinstance(args, tuple) else (args,)))
+                   for args in iterable_of_args]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """
+        Wait for pending operations and shut down all connections.
+        """
+        self._executor.shutdown(wait=True)
+        for client in self.clients:
+            client.close()
+
+    def __enter__(self) -> "ArchRepoPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -5,15 +5,15 @@ Example usage of the ArchRepo API
 
 from archrepo import ArchRepoClient
 
+
 def main():
-    # Initialize the client with your server details
-    client = ArchRepoClient(
-        host="localhost",
-        port="2222",
-        user="pkguser",
-        key_path="./ssh-keys/id_ed25519"
-    )
+    # Initialize the client with the server's Host entry in ~/.ssh/config;
+    # all calls in the with-block share one SSH connection
+    with ArchRepoClient(host="ssh_server") as client:
+        run_examples(client)
+
 
+def run_examples(client):
     # Example 1: Publish a package (upload and add to repository in one step)
     success, message = client.publish_package("my-package-1.0-1-x86_64.pkg.tar.zst")
     print(f"Publish result: {message}")
@@ -40,5 +40,6 @@ def main():
     success, message = client.remove_package("my-package")
     print(f"\nRemove result: {message}")
 
+
 if __name__ == "__main__":
     main()
@@ -5,15 +5,236 @@ pkg_shell.py - Custom shell for pkguser that provides repository management func
 
 import os
 import sys
-import base64
+import binascii
+import errno
 import subprocess
 import re
+import tarfile
 import datetime
-import tempfile
+import time
+import atexit
 import traceback
 import logging
-from pathlib import Path
+import logging.handlers
+import queue
 import hashlib
+import json
+import math
+import shlex
+import shutil
+from collections import defaultdict
+from functools import cmp_to_key
+
+# pyalpm compares versions with libalpm, otherwise pacman's vercmp tool is run
+try:
+    import pyalpm
+except ImportError:
+    pyalpm = None
+
+# zstandard reads the repository database in-process, otherwise bsdtar lists it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# libarchive-c validates packages in-process, otherwise bsdtar lists them
+try:
+    import libarchive
+except ImportError:
+    libarchive = None
+
+# pybase64 provides SIMD-accelerated base64 with the same interface
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# Commands that print their result as a single JSON line when given --json
+JSON_COMMANDS = {"add", "remove", "list", "clean", "status"}
+
+# Commands ending the session
+EXIT_COMMANDS = {"exit", "quit", "logout"}
+
+# Hash algorithms accepted for upload verification, recognized by the length of the hex digest
+HASH_ALGORITHMS = {64: "sha256", 128: "sha512"}
+
+# Octal escapes of spaces and other special characters in /proc/self/mounts
+MOUNT_ESCAPE_RE = re.compile(r"\\([0-7]{3})")
+
+# Buffer size for the standard input of non-interactive sessions, which carries file uploads
+STDIN_BUFFER_SIZE = 1 << 20
+
+# Amount of base64 text decoded at once when receiving a file
+BASE64_WINDOW = 1 << 20
+
+# Bytes outside the base64 alphabet, which the decoder ignores; they are dropped
+# before decoding, so that windows of whole quanta are cut at the right places
+BASE64_IGNORED = bytes(sorted(set(range(256)) - set(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=")))
+
+# Files smaller than this are written without reserving their space beforehand
+PREALLOCATE_MIN_SIZE = 1 << 20
+
+# Maximum number of packages passed to a single repo-add run, to stay well within ARG_MAX
+REPO_ADD_BATCH_SIZE = 1000
+
+# Number of commands of a non-interactive session logged to the history file at once
+HISTORY_BATCH_SIZE = 16
+
+
+def _human_size(size):
+    """Format a size in bytes the way 'du -h' and 'df -h' do, e.g. 512, 4.0K or 253M"""
+    for unit in "BKMGTP":
+        if size < 1024 or unit == "P":
+            break
+        size /= 1024
+    if unit == "B":
+        return str(size)
+    if size < 10:
+        return f"{math.ceil(size * 10) / 10:.1f}{unit}"
+    return f"{math.ceil(size)}{unit}"
+
+
+def _allocated_size(entry_stat, seen):
+    """Get the disk space allocated to a file, or 0 for another hard link to one already counted"""
+    if entry_stat.st_nlink > 1:
+        inode = (entry_stat.st_dev, entry_stat.st_ino)
+        if inode in seen:
+            return 0
+        seen.add(inode)
+    return entry_stat.st_blocks * 512
+
+
+def _disk_usage(path, seen):
+    """Sum up the disk space allocated to a directory tree, counting hard links once, like 'du -s'"""
+    total = 0
+    pending = [path]
+    while pending:
+        directory = pending.pop()
+        try:
+            total += os.stat(directory, follow_symlinks=False).st_blocks * 512
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        else:
+                            total += _allocated_size(entry.stat(follow_symlinks=False), seen)
+                    except OSError:
+                        # Removed while scanning
+                        pass
+        except OSError:
+            pass
+    return total
+
+
+def _mount_source(path):
+    """Find the device or source of the filesystem a path is on, as shown by 'df'"""
+    path = os.path.realpath(path)
+    source, mount_point = "-", ""
+    with open("/proc/self/mounts") as mounts:
+        for line in mounts:
+            fields = line.split()
+            if len(fields) < 2:
+                continue
+            candidate = MOUNT_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), fields[1])
+            if (path == candidate or path.startswith(candidate.rstrip("/") + "/")) \
+                    and len(candidate) >= len(mount_point):
+                source, mount_point = fields[0], candidate
+    return source
+
+
+def _package_name(path):
+    """Get the package name from a "<name>-<version>-<arch>.pkg.tar.zst" file name"""
+    # Split from the right, names may contain "-<digit>" themselves (e.g. xorg-fonts-75dpi)
+    return os.path.basename(path)[:-len(".pkg.tar.zst")].rsplit("-", 3)[0]
+
+
+def _package_version(path):
+    """Get the "[epoch:]pkgver-pkgrel" version from a "<name>-<version>-<arch>.pkg.tar.zst" file name"""
+    parts = os.path.basename(path)[:-len(".pkg.tar.zst")].rsplit("-", 3)
+    return f"{parts[1]}-{parts[2]}" if len(parts) == 4 else ""
+
+
+def _vercmp(a, b):
+    """Compare two package versions the way pacman does, returning <0, 0 or >0"""
+    if pyalpm is not None:
+        return pyalpm.vercmp(a, b)
+    result = subprocess.run(["vercmp", a, b], check=True, capture_output=True, text=True)
+    return int(result.stdout)
+
+
+def _advise_sequential(f):
+    """Tell the kernel a file will be read sequentially, so it reads ahead in larger batches"""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _preallocate(f, size):
+    """Reserve the space for a file of known size at once, so it gets few large extents"""
+    if size < PREALLOCATE_MIN_SIZE or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError as e:
+        if e.errno not in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+            raise
+
+
+def _move_file(src, dst):
+    """Move a file with a rename, or across filesystems with an in-kernel copy"""
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # copy_file_range() can reflink or copy on the server side, sendfile() at least
+    # keeps the data in the kernel; shutil.copyfile() picks the latter or a plain copy
+    copied = False
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                _advise_sequential(fsrc)
+                remaining = os.fstat(fsrc.fileno()).st_size
+                _preallocate(fdst, remaining)
+                while remaining > 0:
+                    count = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if count == 0:
+                        break
+                    remaining -= count
+            copied = remaining <= 0
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+    if not copied:
+        shutil.copyfile(src, dst)
+
+    shutil.copystat(src, dst)
+    os.unlink(src)
+
+
+def _tail_lines(path, count, block_size=8192):
+    """Read the last lines of a file, reading backwards from its end only as far as needed"""
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        blocks = []
+        newlines = 0
+        # One more line ending than lines wanted, the last line usually ends with one too
+        while position > 0 and newlines <= count:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            newlines += block.count(b"\n")
+            blocks.append(block)
+
+    lines = b"".join(reversed(blocks)).decode('utf-8', 'replace').splitlines()
+    return lines[-count:] if count > 0 else []
 
 
 class PackageRepositoryShell:
@@ -28,13 +249,49 @@ class PackageRepositoryShell:
         self.history_file = os.environ.get("HISTORY_FILE", os.path.expanduser("~/.pkg_shell_history"))
         self.error_log_file = os.environ.get("ERROR_LOG_FILE", os.path.expanduser("~/.pkg_shell_errors.log"))
 
+        # Input from a terminal is read with input() for line editing, otherwise
+        # lines are read from the binary stdin, so that raw file data can follow them
+        self.interactive = sys.stdin.isatty()
+        self.stdin = None if self.interactive else open(sys.stdin.fileno(), 'rb', buffering=STDIN_BUFFER_SIZE,
+                                                        closefd=False)
+
+        # Structured result and last error of the current command, for --json
+        self.result = {}
+        self.last_error = None
+
+        # Command handlers, all taking the argument string
+        self._commands = {
+            "add": self.add_package,
+            "remove": self.remove_package,
+            "list": lambda args: self.list_packages(),
+            "clean": lambda args: self.clean_repo(),
+            "status": lambda args: self.show_status(),
+            "receive": self.receive_file,
+            "receive-raw": self.receive_raw_file,
+            "send": self.send_file,
+            "send-raw": self.send_raw_file,
+            "errors": lambda args: self.show_recent_errors(),
+            # Flushed, since clients wait for echoed markers while the session stays open
+            "echo": lambda args: print(args, flush=True) or True,
+            "help": lambda args: self.show_help() or True,
+        }
+
+        # Packages of the repository database and the database file state they were read from
+        self._db_cache = None
+        self._db_cache_key = None
+
         # Set up logging
         self._setup_logging()
 
         # Create required directories
         os.makedirs(self.repo_dir, exist_ok=True)
         os.makedirs(self.upload_dir, exist_ok=True)
-        Path(self.history_file).touch(exist_ok=True)
+
+        # History lines are appended through a descriptor kept open for the session;
+        # non-interactive sessions write them in batches
+        self._history_fd = os.open(self.history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._history_buffer = []
+        atexit.register(self.flush_history)
 
     def _setup_logging(self):
         """Set up logging configuration"""
@@ -50,15 +307,27 @@ class PackageRepositoryShell:
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
 
-        # Add the handlers to the logger
-        self.logger.addHandler(file_handler)
+        # The file is written by a background thread, so that commands do not wait
+        # for the disk; the queue is drained when the shell exits
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self._log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        self._log_listener.start()
+        atexit.register(self._log_listener.stop)
+
+    def _flush_log(self):
+        """Wait until the queued log records are written to the error log"""
+        self._log_listener.stop()
+        self._log_listener.start()
 
     def log_error(self, command, error, detail=None):
         """Log an error with details and return formatted error message"""
-        # Get the current timestamp
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # The log record gets its own timestamp from the formatter, this one is for the user
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
 
         # Log to error log file
+        self.last_error = error
+
         error_message = f"Command: {command} | Error: {error}"
         if detail:
             error_message += f" | Detail: {detail}"
@@ -84,20 +353,29 @@ class PackageRepositoryShell:
     def show_help(self):
         """Display help menu"""
         print("Available commands:")
-        print("  add <package-file.pkg.tar.zst>  - Add a package to the repository")
+        print("  add <package-file.pkg.tar.zst> [...]")
+        print("                                  - Add packages to the repository")
         print("  remove <package-name>           - Remove a package from the repository")
         print("  list                            - List all packages in the repository")
         print("  clean                           - Clean up old package versions")
-        print("  receive <filename> [sha512hash] - Receive a file through SSH with optional hash verification")
+        print("  receive <filename> [hash]       - Receive a file through SSH with optional SHA-256/SHA-512 verification")
+        print("  receive-raw <filename> <size> [hash]")
+        print("                                  - Receive <size> raw bytes following the command line")
+        print("  send <filename>                 - Send a file from the repository through SSH as base64")
+        print("  send-raw <filename>             - Send a file from the repository as raw bytes after its size")
         print("  status                          - Show repository statistics")
         print("  errors                          - Show recent error logs")
+        print("  echo <text>                     - Print text (delimits output of batched commands)")
         print("  help                            - Show this help message")
         print("  exit                            - Log out")
         print()
+        print("add, remove, list, clean and status accept --json to print their result as a JSON line.")
+        print()
 
     def show_recent_errors(self, count=10):
         """Show recent errors from the error log"""
         try:
+            self._flush_log()
             if not os.path.exists(self.error_log_file) or os.path.getsize(self.error_log_file) == 0:
                 print("No errors logged yet.")
                 return True
@@ -105,11 +383,8 @@ class PackageRepositoryShell:
             print(f"Recent errors (last {count}):")
             print("-" * 70)
 
-            with open(self.error_log_file, 'r') as f:
-                lines = f.readlines()
-
             # Show the last 'count' lines
-            for line in lines[-count:]:
+            for line in _tail_lines(self.error_log_file, count):
                 print(line.strip())
 
             print("-" * 70)
@@ -122,6 +397,17 @@ class PackageRepositoryShell:
 
     def _is_valid_package(self, pkg_path):
         """Check if the package file is a valid .pkg.tar.zst file"""
+        if libarchive is not None:
+            # Opening the archive and reading its first header checks the format,
+            # without decompressing the rest of the package
+            try:
+                with libarchive.file_reader(pkg_path) as archive:
+                    next(iter(archive), None)
+                return True
+            except libarchive.ArchiveError as e:
+                self.logger.warning(f"Package validation failed for {pkg_path}: {e}")
+                return False
+
         try:
             # Use bsdtar to validate the package format
             result = subprocess.run(
@@ -136,17 +422,62 @@ class PackageRepositoryShell:
             self.logger.warning(f"Failed to validate package {pkg_path}: {e}")
             return False
 
-    def add_package(self, pkg_path):
-        """Add a package to the repository"""
-        cmd = f"add {pkg_path}"
+    def add_package(self, pkg_args):
+        """Add one or more packages to the repository, updating the database once"""
+        cmd = f"add {pkg_args}"
 
-        if not pkg_path:
+        if not pkg_args:
             error_msg = self.log_error(cmd, "No package specified",
                                       "Command requires a package file path")
             print(error_msg)
-            print("Usage: add <package-file.pkg.tar.zst>")
+            print("Usage: add <package-file.pkg.tar.zst> [...]")
+            return False
+
+        try:
+            # repo-add rewrites the whole database, so all packages go in with a single call
+            pkg_paths = pkg_args.split()
+            pkg_files = [self._stage_package(cmd, pkg_path) for pkg_path in pkg_paths]
+            staged = [os.path.join(self.repo_dir, pkg_file) for pkg_file in pkg_files if pkg_file]
+            rejected = [os.path.basename(pkg_path) for pkg_path, pkg_file in zip(pkg_paths, pkg_files)
+                        if not pkg_file]
+            if not staged:
+                self.result = {"added": [], "rejected": rejected}
+                return False
+
+            # Update the repository database
+            print("Updating repository database...")
+
+            # repo-add reports every package on stdout, only its errors are of interest
+            process = subprocess.run(["repo-add", os.path.join(self.repo_dir, self.db_name)] + staged,
+                                    check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    text=True, cwd=self.repo_dir)
+            self._db_cache = None
+            added = [os.path.basename(path) for path in staged]
+            self.result = {"added": added, "rejected": rejected}
+            self.logger.info(f"Successfully added package{'s' if len(staged) > 1 else ''}: {', '.join(added)}")
+            if rejected:
+                # The rest was added, but the command as a whole failed
+                self.last_error = f"Packages rejected: {', '.join(rejected)}"
+                print(f"Added {len(added)} of {len(pkg_files)} packages: {', '.join(added)}")
+                print(f"Rejected packages: {', '.join(rejected)}")
+                return False
+            print(f"Package{'s' if len(staged) > 1 else ''} added successfully.")
+            return True
+        except subprocess.CalledProcessError as e:
+            error_msg = self.log_error(cmd, f"Error adding package to repository",
+                                     f"Command: repo-add {os.path.join(self.repo_dir, self.db_name)} {' '.join(staged)}, "
+                                     f"Return code: {e.returncode}, "
+                                     f"Stderr: {e.stderr}")
+            print(error_msg)
+            return False
+        except Exception as e:
+            error_msg = self.log_error(cmd, f"Unexpected error adding package",
+                                     traceback.format_exc())
+            print(error_msg)
             return False
 
+    def _stage_package(self, cmd, pkg_path):
+        """Move an uploaded package and its signature into the repository and validate it, returning its file name"""
         # Check if package exists in current location or repo
         pkg_path = os.path.join(self.upload_dir, pkg_path)
         pkg_exists = os.path.isfile(pkg_path)
@@ -158,18 +489,19 @@ class PackageRepositoryShell:
                                       f"Checked paths: {pkg_path}, {repo_pkg_path}")
             print(error_msg)
             print("Note: Package must be in the current directory or already in the repository")
-            return False
+            return None
 
         # If package is not in repo, copy it there
         if not repo_pkg_exists:
             print("Copying package to repository...")
+            # A rename within the filesystem, otherwise an in-kernel copy, without spawning mv
             try:
-                subprocess.run(["mv", pkg_path, self.repo_dir], check=True)
-            except subprocess.CalledProcessError as e:
+                _move_file(pkg_path, repo_pkg_path)
+            except OSError as e:
                 error_msg = self.log_error(cmd, f"Failed to move package to repository",
-                                         f"Command: mv {pkg_path} {self.repo_dir}, Error: {e}, Return code: {e.returncode}")
+                                         f"Move: {pkg_path} -> {repo_pkg_path}, Error: {e}")
                 print(error_msg)
-                return False
+                return None
 
             pkg_file = os.path.basename(pkg_path)
 
@@ -180,15 +512,15 @@ class PackageRepositoryShell:
             if os.path.isfile(sig_path):
                 print("Copying signature file to repository...")
                 try:
-                    subprocess.run(["mv", sig_path, self.repo_dir], check=True)
-                except subprocess.CalledProcessError as e:
+                    _move_file(sig_path, os.path.join(self.repo_dir, f"{pkg_file}.sig"))
+                except OSError as e:
                     self.logger.warning(f"Failed to move signature file: {e}")
                     print(f"Warning: Failed to move signature file: {e}")
             elif os.path.isfile(upload_sig_path):
                 print("Copying signature file from uploads to repository...")
                 try:
-                    subprocess.run(["mv", upload_sig_path, self.repo_dir], check=True)
-                except subprocess.CalledProcessError as e:
+                    _move_file(upload_sig_path, os.path.join(self.repo_dir, f"{pkg_file}.sig"))
+                except OSError as e:
                     self.logger.warning(f"Failed to move uploaded signature file: {e}")
                     print(f"Warning: Failed to move uploaded signature file: {e}")
         else:
@@ -199,33 +531,51 @@ class PackageRepositoryShell:
             error_msg = self.log_error(cmd, "Invalid package file",
                                        f"File {repo_pkg_path} is not a valid .pkg.tar.zst package")
             print(error_msg)
-            return False
+            return None
+
+        return pkg_file
+
+    def _db_packages(self):
+        """Read the packages of the repository database, as a {name: version} dict sorted by name"""
+        db_path = os.path.join(self.repo_dir, self.db_name)
 
-        # Update the repository database
-        print("Updating repository database...")
-        current_dir = os.getcwd()
-        os.chdir(self.repo_dir)
+        # Reuse the last reading while the database file has not been replaced or modified
+        db_stat = os.stat(db_path)
+        cache_key = (db_stat.st_ino, db_stat.st_mtime_ns, db_stat.st_size)
+        if self._db_cache is not None and cache_key == self._db_cache_key:
+            return dict(self._db_cache)
 
         try:
-            process = subprocess.run(["repo-add", os.path.join(self.repo_dir, self.db_name), os.path.join(self.repo_dir, pkg_file)],
-                                    check=True, capture_output=True, text=True)
-            print("Package added successfully.")
-            self.logger.info(f"Successfully added package: {pkg_file}")
-            return True
-        except subprocess.CalledProcessError as e:
-            error_msg = self.log_error(cmd, f"Error adding package to repository",
-                                     f"Command: repo-add {os.path.join(self.repo_dir, self.db_name)} {os.path.join(self.repo_dir, pkg_file)}, "
-                                     f"Return code: {e.returncode}, "
-                                     f"Stdout: {e.stdout}, Stderr: {e.stderr}")
-            print(error_msg)
-            return False
-        except Exception as e:
-            error_msg = self.log_error(cmd, f"Unexpected error adding package",
-                                     traceback.format_exc())
-            print(error_msg)
-            return False
-        finally:
-            os.chdir(current_dir)
+            with tarfile.open(db_path) as db:
+                members = db.getnames()
+        except (tarfile.ReadError, tarfile.CompressionError):
+            # This Python cannot decompress the database (zstd needs 3.14)
+            if zstandard is not None:
+                with open(db_path, 'rb') as f, zstandard.ZstdDecompressor().stream_reader(f) as stream, \
+                        tarfile.open(fileobj=stream, mode='r|') as db:
+                    members = [member.name for member in db]
+            else:
+                result = subprocess.run(["bsdtar", "-tf", db_path], check=True, capture_output=True, text=True)
+                members = result.stdout.splitlines()
+
+        # Each package has a "<name>-<pkgver>-<pkgrel>/" directory
+        packages = {}
+        for member in members:
+            entry = member.split("/", 1)[0].rsplit("-", 2)
+            if len(entry) == 3:
+                packages[entry[0]] = f"{entry[1]}-{entry[2]}"
+
+        self._db_cache = dict(sorted(packages.items()))
+        self._db_cache_key = cache_key
+        return dict(self._db_cache)
+
+    def _package_files(self):
+        """List the package files of the repository directory, as (package name, path) pairs"""
+        # A plain suffix test per entry, rather than the fnmatch patterns of glob()
+        with os.scandir(self.repo_dir) as entries:
+            return [(_package_name(entry.name), entry.path)
+                    for entry in entries
+                    if entry.name.endswith(".pkg.tar.zst") and entry.is_file(follow_symlinks=False)]
 
     def remove_package(self, pkg_name):
         """Remove a package from the repository"""
@@ -238,28 +588,12 @@ class PackageRepositoryShell:
             print("Usage: remove <package-name>")
             return False
 
-        current_dir = os.getcwd()
-        os.chdir(self.repo_dir)
-
         try:
-            # Check if package exists in database using the configured repo repository
-            result = subprocess.run(
-                ["pacman", "-Syl", "repo"],
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode != 0:
-                error_msg = self.log_error(cmd, "Error checking repository contents",
-                                         f"Command: pacman -Syl repo, "
-                                         f"Return code: {result.returncode}, "
-                                         f"Stderr: {result.stderr}")
-                print(error_msg)
-                return False
-
-            if not any(re.search(rf"\brepo\s+{re.escape(pkg_name)}\b", line) for line in result.stdout.splitlines()):
+            # Check if package exists in the repository database itself
+            packages = self._db_packages()
+            if pkg_name not in packages:
                 error_msg = self.log_error(cmd, f"Package not found in repository: {pkg_name}",
-                                         f"Available packages: {result.stdout}")
+                                         f"Available packages: {', '.join(packages)}")
                 print(error_msg)
                 return False
 
@@ -269,27 +603,32 @@ class PackageRepositoryShell:
                 ["repo-remove", self.db_name, pkg_name],
                 check=True,
                 capture_output=True,
-                text=True
+                text=True,
+                cwd=self.repo_dir
             )
+            self._db_cache = None
 
             # Remove package files and signatures
             print("Removing package files and signatures...")
-            pkg_files = list(Path(self.repo_dir).glob(f"{pkg_name}-*.pkg.tar.zst"))
-            sig_files = list(Path(self.repo_dir).glob(f"{pkg_name}-*.pkg.tar.zst.sig"))
+            pkg_files = [path for name, path in self._package_files() if name == pkg_name]
 
             if not pkg_files:
                 self.logger.warning(f"No package files found for {pkg_name}")
                 print(f"Warning: No package files found for {pkg_name}")
 
             removed_files = []
-            for f in pkg_files + sig_files:
-                try:
-                    print(f"Removing {f.name}")
-                    f.unlink()
-                    removed_files.append(f.name)
-                except Exception as e:
-                    self.logger.warning(f"Failed to remove file {f.name}: {e}")
-                    print(f"Warning: Failed to remove file {f.name}: {e}")
+            for pkg_file in pkg_files:
+                for path in (pkg_file, f"{pkg_file}.sig"):
+                    name = os.path.basename(path)
+                    try:
+                        os.unlink(path)
+                        print(f"Removing {name}")
+                        removed_files.append(name)
+                    except FileNotFoundError:
+                        pass
+                    except Exception as e:
+                        self.logger.warning(f"Failed to remove file {name}: {e}")
+                        print(f"Warning: Failed to remove file {name}: {e}")
 
             print("Package removed successfully.")
             self.logger.info(f"Successfully removed package: {pkg_name}, "
@@ -307,8 +646,6 @@ class PackageRepositoryShell:
                                      traceback.format_exc())
             print(error_msg)
             return False
-        finally:
-            os.chdir(current_dir)
 
     def list_packages(self):
         """List all packages in the repository"""
@@ -317,31 +654,20 @@ class PackageRepositoryShell:
         print("Packages in repository:")
         print("----------------------")
 
-        current_dir = os.getcwd()
-        os.chdir(self.repo_dir)
-
         try:
-            # Use pacman -Syl repo with the properly configured repository
-            result = subprocess.run(
-                ["pacman", "-Syl", "repo"],
-                capture_output=True,
-                text=True
-            )
+            # Read the repository database, rather than having pacman sync and list it
+            packages = self._db_packages()
 
-            if result.returncode != 0:
-                error_msg = self.log_error(cmd, "Error listing packages",
-                                         f"Command: pacman -Syl repo, "
-                                         f"Return code: {result.returncode}, "
-                                         f"Stderr: {result.stderr}")
-                print(error_msg)
-                return False
+            # Same "<repo> <name> <version>" lines as pacman -Sl
+            if packages:
+                print("\n".join(f"repo {name} {version}" for name, version in packages.items()))
 
-            print(result.stdout.strip())
+            self.result = {"packages": [{"name": name, "version": version, "description": ""}
+                                        for name, version in packages.items()]}
 
             # Count packages
-            count = len(result.stdout.splitlines())
             print("----------------------")
-            print(f"Total packages: {count}")
+            print(f"Total packages: {len(packages)}")
             return True
         except subprocess.CalledProcessError as e:
             error_msg = self.log_error(cmd, f"Error listing packages",
@@ -354,8 +680,6 @@ class PackageRepositoryShell:
                                      traceback.format_exc())
             print(error_msg)
             return False
-        finally:
-            os.chdir(current_dir)
 
     def clean_repo(self):
         """Clean repository by removing old package versions"""
@@ -363,63 +687,79 @@ class PackageRepositoryShell:
 
         print("Cleaning repository...")
 
-        current_dir = os.getcwd()
-        os.chdir(self.repo_dir)
-
         try:
+            # A single directory scan serves both the cleanup and the database update
+            versions = defaultdict(list)
+            for pkg_name, pkg_file in self._package_files():
+                versions[pkg_name].append(pkg_file)
+
+            # For each package name, keep only the latest version (last in sorted list);
+            # versions are ordered like pacman does, so that e.g. 1.10 is newer than 1.9
+            version_key = cmp_to_key(lambda a, b: _vercmp(_package_version(a), _package_version(b)))
+            latest = {}
+            doomed = []
+            for pkg_name, pkg_versions in versions.items():
+                pkg_versions.sort(key=version_key)
+                latest[pkg_name] = pkg_versions[-1]
+                doomed.extend(pkg_versions[:-1])
+
+            # Unlink by name relative to the open repository directory (unlinkat),
+            # rather than resolving the full path of each file again
             cleaned = 0
-            pkg_files = list(Path(self.repo_dir).glob("*.pkg.tar.zst"))
-
-            # Get unique package names
-            pkg_names = set()
-            for pkg_file in pkg_files:
-                # Extract package name (without version)
-                pkg_name = re.sub(r'-[0-9].*$', '', pkg_file.name)
-                pkg_names.add(pkg_name)
-
-            # For each package name, find and keep only the latest version
-            for pkg_name in pkg_names:
-                versions = sorted(Path(self.repo_dir).glob(f"{pkg_name}-*.pkg.tar.zst"))
-                if len(versions) > 1:
-                    print(f"Cleaning old versions of {pkg_name}...")
-                    # Keep only the latest version (last in sorted list)
-                    for old_version in versions[:-1]:
-                        print(f"Removing {old_version.name}")
+            dir_fd = os.open(self.repo_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                for old_version in doomed:
+                    name = os.path.basename(old_version)
+                    try:
+                        # Count only package files actually removed here, not ones gone already
                         try:
-                            old_version.unlink(missing_ok=True)
-                            sig_file = Path(f"{old_version}.sig")
-                            sig_file.unlink(missing_ok=True)
+                            os.unlink(name, dir_fd=dir_fd)
                             cleaned += 1
-                        except Exception as e:
-                            self.logger.warning(f"Failed to remove old version {old_version.name}: {e}")
-                            print(f"Warning: Failed to remove old version {old_version.name}: {e}")
-
-            # Rebuild the database
-            print("Rebuilding repository database...")
-            pkg_files = list(Path(self.repo_dir).glob("*.pkg.tar.zst"))
-            if pkg_files:
-                process = subprocess.run(
-                    ["repo-add", "-f", os.path.join(self.repo_dir, self.db_name)] + [str(f) for f in pkg_files],
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
-            else:
-                # Create empty database if no packages exist
-                process = subprocess.run(
-                    ["repo-add", "-f", os.path.join(self.repo_dir, self.db_name)],
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
+                        except FileNotFoundError:
+                            pass
+                        try:
+                            os.unlink(f"{name}.sig", dir_fd=dir_fd)
+                        except FileNotFoundError:
+                            pass
+                    except OSError as e:
+                        self.logger.warning(f"Failed to remove old version {name}: {e}")
+            finally:
+                os.close(dir_fd)
 
+            # Only the packages whose latest file is not the version in the database
+            # need repo-add, rather than rebuilding the entries of the whole repository
+            try:
+                db_packages = self._db_packages()
+                db_exists = True
+            except FileNotFoundError:
+                db_packages = {}
+                db_exists = False
+            stale = [pkg_file for pkg_name, pkg_file in latest.items()
+                     if db_packages.get(pkg_name) != _package_version(pkg_file)]
+            if stale or not db_exists:
+                print("Updating repository database...")
+                # Without any packages, repo-add still creates an empty database
+                batches = [stale[start:start + REPO_ADD_BATCH_SIZE]
+                           for start in range(0, len(stale), REPO_ADD_BATCH_SIZE)] or [[]]
+                for batch in batches:
+                    subprocess.run(
+                        ["repo-add", "-f", os.path.join(self.repo_dir, self.db_name)] + batch,
+                        check=True,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                        cwd=self.repo_dir
+                    )
+                    self._db_cache = None
+
+            self.result = {"removed": cleaned}
             print(f"Repository cleaned successfully. Removed {cleaned} old package versions.")
             self.logger.info(f"Repository cleaned. Removed {cleaned} old package versions.")
             return True
         except subprocess.CalledProcessError as e:
             error_msg = self.log_error(cmd, f"Error cleaning repository",
                                      f"Command failed with return code {e.returncode}, "
-                                     f"Stdout: {e.stdout}, Stderr: {e.stderr}")
+                                     f"Stderr: {e.stderr}")
             print(error_msg)
             return False
         except Exception as e:
@@ -427,8 +767,6 @@ class PackageRepositoryShell:
                                      traceback.format_exc())
             print(error_msg)
             return False
-        finally:
-            os.chdir(current_dir)
 
     def show_status(self):
         """Show status of the repository"""
@@ -437,59 +775,69 @@ class PackageRepositoryShell:
         print("Repository Status:")
         print("-----------------")
 
-        current_dir = os.getcwd()
-        os.chdir(self.repo_dir)
+        info = {}
+        self.result = {"info": info}
 
         try:
-            # Count packages
-            pkg_count = len(list(Path(self.repo_dir).glob("*.pkg.tar.zst")))
+            # Count packages and signatures, sum up the disk space allocated to them
+            # (like 'du -s') and find the database modification time in one directory scan
+            pkg_count = 0
+            sig_count = 0
+            db_mtime = None
+            seen = set()
+            repo_size = os.stat(self.repo_dir).st_blocks * 512
+            with os.scandir(self.repo_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.endswith(".pkg.tar.zst"):
+                        pkg_count += 1
+                    elif name.endswith(".pkg.tar.zst.sig"):
+                        sig_count += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Only subdirectories need a walk of their own
+                            repo_size += _disk_usage(entry.path, seen)
+                            continue
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        # Removed while scanning
+                        continue
+                    repo_size += _allocated_size(entry_stat, seen)
+                    if name == self.db_name:
+                        db_mtime = entry_stat.st_mtime
+
+            info["Total packages"] = str(pkg_count)
             print(f"Total packages: {pkg_count}")
-
-            # Count signatures
-            sig_count = len(list(Path(self.repo_dir).glob("*.pkg.tar.zst.sig")))
+            info["Signed packages"] = str(sig_count)
             print(f"Signed packages: {sig_count}")
 
             # Repository size
-            try:
-                repo_size_result = subprocess.run(
-                    ["du", "-sh", self.repo_dir],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                repo_size = repo_size_result.stdout.split()[0]
-                print(f"Repository size: {repo_size}")
-            except subprocess.CalledProcessError as e:
-                self.logger.warning(f"Failed to get repository size: {e}")
-                print("Repository size: Unknown")
+            info["Repository size"] = _human_size(repo_size)
+            print(f"Repository size: {info['Repository size']}")
 
             # Last update time
-            try:
-                db_path = Path(self.repo_dir) / self.db_name
-                if db_path.exists():
-                    last_update = datetime.datetime.fromtimestamp(db_path.stat().st_mtime)
-                    print(f"Last database update: {last_update}")
-                else:
-                    print("Last database update: Never")
-            except Exception as e:
-                self.logger.warning(f"Failed to get last update time: {e}")
-                print("Last database update: Unknown")
+            if db_mtime is not None:
+                last_update = datetime.datetime.fromtimestamp(db_mtime)
+                info["Last database update"] = str(last_update)
+                print(f"Last database update: {last_update}")
+            else:
+                info["Last database update"] = "Never"
+                print("Last database update: Never")
 
             # Disk space
             try:
-                disk_result = subprocess.run(
-                    ["df", "-h", self.repo_dir],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                disk_info = disk_result.stdout.splitlines()
-                if len(disk_info) > 1:
-                    disk_usage = disk_info[1].split()
-                    print("Disk usage:")
-                    print(f"  Filesystem: {disk_usage[0]}, Size: {disk_usage[1]}, "
-                        f"Used: {disk_usage[2]}, Avail: {disk_usage[3]}, Use%: {disk_usage[4]}")
-            except subprocess.CalledProcessError as e:
+                disk = shutil.disk_usage(self.repo_dir)
+                use_percent = -(-disk.used * 100 // (disk.used + disk.free)) if disk.used + disk.free else 0
+                try:
+                    filesystem = _mount_source(self.repo_dir)
+                except OSError:
+                    filesystem = "-"
+                info["Disk usage"] = (f"Filesystem: {filesystem}, Size: {_human_size(disk.total)}, "
+                                      f"Used: {_human_size(disk.used)}, Avail: {_human_size(disk.free)}, "
+                                      f"Use%: {use_percent}%")
+                print("Disk usage:")
+                print(f"  {info['Disk usage']}")
+            except OSError as e:
                 self.logger.warning(f"Failed to get disk usage: {e}")
                 print("Disk usage: Unknown")
 
@@ -499,8 +847,59 @@ class PackageRepositoryShell:
                                      traceback.format_exc())
             print(error_msg)
             return False
-        finally:
-            os.chdir(current_dir)
+
+    def _readline(self):
+        """Read a line of input without the line ending, or None at the end of input"""
+        if self.interactive:
+            try:
+                return input()
+            except EOFError:
+                return None
+
+        line = self.stdin.readline()
+        if not line:
+            return None
+        return line.decode('utf-8', 'replace').rstrip("\r\n")
+
+    def _base64_input(self):
+        """Read base64 data up to a line containing only 'EOF', as blocks of bytes of the base64 alphabet only"""
+        if self.interactive:
+            for line in iter(self._readline, None):
+                if line == "EOF":
+                    return
+                yield line.encode('ascii', 'replace').translate(None, BASE64_IGNORED)
+            return
+
+        # Take whole buffered lines at a time, rather than a line per call
+        while True:
+            data = self.stdin.peek()
+            if not data:
+                return
+
+            end = data.rfind(b"\n") + 1
+            if end == 0:
+                # Only part of a line is buffered, finish it
+                line = self.stdin.readline().rstrip(b"\r\n")
+                if line == b"EOF":
+                    return
+                yield line.translate(None, BASE64_IGNORED)
+                continue
+
+            # Stop at the EOF line, the input after it is the next command
+            block = data[:end]
+            markers = [0] if block.startswith((b"EOF\n", b"EOF\r\n")) else []
+            markers += [pos + 1 for pos in (block.find(b"\nEOF\n"), block.find(b"\nEOF\r\n")) if pos >= 0]
+            if markers:
+                yield self.stdin.read(min(markers)).translate(None, BASE64_IGNORED)
+                self.stdin.readline()
+                return
+
+            yield self.stdin.read(end).translate(None, BASE64_IGNORED)
+
+    @staticmethod
+    def _new_hasher(file_hash):
+        """Create the hash object matching an expected hex digest (SHA-512 by default)"""
+        return hashlib.new(HASH_ALGORITHMS.get(len(file_hash or ""), "sha512"))
 
     def receive_file(self, args):
         """Receive a file through SSH with hash verification"""
@@ -515,139 +914,339 @@ class PackageRepositoryShell:
             error_msg = self.log_error(cmd, "No filename specified",
                                      "Command requires a filename")
             print(error_msg)
-            print("Usage: receive <filename> [sha512-hash]")
+            print("Usage: receive <filename> [sha256-or-sha512-hash]")
             return False
 
-        is_signature = filename.endswith('.sig')
-
         print(f"Ready to receive file: {filename}")
         if file_hash:
-            print(f"Will verify SHA-512 hash: {file_hash}")
+            print(f"Will verify {self._new_hasher(file_hash).name.upper()} hash: {file_hash}")
         print("Please paste the base64-encoded file content and end with a line containing only 'EOF'")
         print("Waiting for data...")
 
-        output_path = None
+        output_path = os.path.join(self.upload_dir, filename)
+        hasher = self._new_hasher(file_hash)
+
+        def decode(data, outfile):
+            binary_data = base64.b64decode(data)
+            hasher.update(binary_data)
+            outfile.write(binary_data)
 
         try:
-            # Collect all base64 chunks in memory
-            base64_chunks = []
+            # Decode the data in windows of whole base64 quanta as it arrives,
+            # so that memory use does not grow with the file size
+            failure = None
+            with open(output_path, 'wb') as outfile:
+                chunks = []
+                pending = 0
+                for block in self._base64_input():
+                    if failure:
+                        # Keep consuming the data up to the EOF marker
+                        continue
+                    chunks.append(block)
+                    pending += len(block)
+                    if pending < BASE64_WINDOW:
+                        continue
+                    data = b''.join(chunks)
+                    whole = len(data) // 4 * 4
+                    chunks = [data[whole:]]
+                    pending = len(chunks[0])
+                    try:
+                        decode(data[:whole], outfile)
+                    except (binascii.Error, IOError) as e:
+                        failure = e
+
+                if not failure:
+                    try:
+                        decode(b''.join(chunks), outfile)
+                    except (binascii.Error, IOError) as e:
+                        failure = e
+        except IOError as e:
+            # The file could not be opened, still consume the data up to the EOF marker
+            failure = e
+            for block in self._base64_input():
+                pass
+
+        if failure:
+            if isinstance(failure, binascii.Error):
+                error_msg = self.log_error(cmd, f"Invalid base64 data",
+                                        f"Base64 decode error: {failure}")
+            else:
+                error_msg = self.log_error(cmd, f"File I/O error",
+                                         f"Failed to write to {output_path}: {failure}")
+            print(error_msg)
+            try:
+                os.unlink(output_path)
+            except:
+                pass
+            return False
 
-            # Read input until we get the EOF marker
-            while True:
-                try:
-                    line = input()
-                    if line == "EOF":
-                        break
-                    base64_chunks.append(line)
-                except EOFError:
-                    # Handle EOF in non-interactive mode
-                    break
+        try:
+            calculated_hash = hasher.hexdigest() if file_hash else None
+            return self._report_received_file(cmd, filename, output_path, file_hash, calculated_hash)
+        except Exception as e:
+            error_msg = self.log_error(cmd, f"Error receiving file",
+                                     traceback.format_exc())
+            print(error_msg)
+            return False
 
-            # Combine all chunks without newlines
-            base64_data = ''.join(base64_chunks)
+    def _report_received_file(self, cmd, filename, output_path, file_hash, calculated_hash):
+        """Check a received file against its expected hash and report the result"""
+        is_signature = filename.endswith('.sig')
 
-            # Decode the base64 data to the actual file
-            output_path = os.path.join(self.upload_dir, filename)
+        # Check if the file was created successfully
+        if not os.path.isfile(output_path):
+            error_msg = self.log_error(cmd, "Failed to receive file",
+                                     f"File {output_path} does not exist after decode operation")
+            print(error_msg)
+            return False
 
-            try:
-                # Decode base64 data directly from memory
-                try:
-                    binary_data = base64.b64decode(base64_data)
-                except base64.Error as e:
-                    error_msg = self.log_error(cmd, f"Invalid base64 data",
-                                            f"Base64 decode error: {e}")
-                    print(error_msg)
-                    return False
-
-                # Write binary data to output file
-                with open(output_path, 'wb') as outfile:
-                    outfile.write(binary_data)
-            except IOError as e:
-                error_msg = self.log_error(cmd, f"File I/O error",
-                                         f"Failed to write to {output_path}: {e}")
+        # Get file size
+        try:
+            file_size = os.path.getsize(output_path)
+            print(f"Size: {file_size} bytes")
+        except Exception as e:
+            self.logger.warning(f"Failed to get file size: {e}")
+            print("Size: Unknown")
+
+        # Verify file integrity with the hash if provided
+        if file_hash:
+            if calculated_hash == file_hash:
+                print(f"{self._new_hasher(file_hash).name.upper()} hash verification: SUCCESS")
+            else:
+                error_msg = self.log_error(cmd, "Hash verification failed",
+                                        f"Expected: {file_hash}\nCalculated: {calculated_hash}")
                 print(error_msg)
+                # Delete the corrupt file
+                try:
+                    os.unlink(output_path)
+                except:
+                    pass
                 return False
 
-            # Check if the file was created successfully
-            if os.path.isfile(output_path):
-                # Get file size
-                try:
-                    file_size = os.path.getsize(output_path)
-                    print(f"Size: {file_size} bytes")
-                except Exception as e:
-                    self.logger.warning(f"Failed to get file size: {e}")
-                    print("Size: Unknown")
-
-                # Verify file integrity with SHA-512 hash if provided
-                if file_hash:
-                    with open(output_path, 'rb') as f:
-                        calculated_hash = hashlib.sha512(f.read()).hexdigest()
-
-                    if calculated_hash == file_hash:
-                        print(f"SHA-512 hash verification: SUCCESS")
-                    else:
-                        error_msg = self.log_error(cmd, "Hash verification failed",
-                                                f"Expected: {file_hash}\nCalculated: {calculated_hash}")
-                        print(error_msg)
-                        # Delete the corrupt file
-                        try:
-                            os.unlink(output_path)
-                        except:
-                            pass
-                        return False
+            msg = f"Successfully received {'signature ' if is_signature else ''}file: {filename} of size {file_size} bytes with hash = {file_hash}"
+            self.logger.info(msg)
+            print(msg)
+        else:
+            msg = f"Successfully received {'signature ' if is_signature else ''}file: {filename} of size {file_size} bytes"
+            self.logger.info(msg)
+            print(msg)
 
-                    msg = f"Successfully received {'signature ' if is_signature else ''}file: {filename} of size {file_size} bytes with hash = {file_hash}"
-                    self.logger.info(msg)
-                    print(msg)
-                else:
-                    msg = f"Successfully received {'signature ' if is_signature else ''}file: {filename} of size {file_size} bytes"
-                    self.logger.info(msg)
-                    print(msg)
+        print(f"Use 'add {filename}' to add it to the repository")
 
-                print(f"Use 'add {filename}' to add it to the repository")
+        return True
 
-                return True
-            else:
-                error_msg = self.log_error(cmd, "Failed to receive file",
-                                         f"File {output_path} does not exist after decode operation")
-                print(error_msg)
-                return False
+    def _discard_input(self, count):
+        """Read and drop the given number of bytes of input, or up to its end"""
+        while count > 0:
+            chunk = self.stdin.read(min(count, 1 << 20))
+            if not chunk:
+                break
+            count -= len(chunk)
+
+    def receive_raw_file(self, args):
+        """Receive a file of known size as raw bytes with hash verification"""
+        # Parse args for filename, size and optional hash; clients quote the filename
+        try:
+            args_parts = shlex.split(args)
+        except ValueError:
+            args_parts = []
+        filename = args_parts[0] if args_parts else ""
+        size = args_parts[1] if len(args_parts) > 1 else ""
+        file_hash = args_parts[2] if len(args_parts) > 2 else None
+
+        cmd = f"receive-raw {filename}"
+
+        if not filename or not size.isdigit():
+            error_msg = self.log_error(cmd, "No filename or size specified",
+                                     "Command requires a filename and the file size in bytes")
+            print(error_msg)
+            print("Usage: receive-raw <filename> <size> [sha256-or-sha512-hash]")
+            return False
+
+        output_path = os.path.join(self.upload_dir, filename)
+        remaining = int(size)
+        hasher = self._new_hasher(file_hash)
+
+        try:
+            # Copy exactly the announced number of bytes from stdin
+            with open(output_path, 'wb') as outfile:
+                _preallocate(outfile, remaining)
+                while remaining > 0:
+                    chunk = self.stdin.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    hasher.update(chunk)
+                    outfile.write(chunk)
+        except IOError as e:
+            # The rest of the data follows on stdin, it must not be taken for commands
+            self._discard_input(remaining)
+            error_msg = self.log_error(cmd, f"File I/O error",
+                                     f"Failed to write to {output_path}: {e}")
+            print(error_msg)
+            try:
+                os.unlink(output_path)
+            except:
+                pass
+            return False
+
+        if remaining:
+            error_msg = self.log_error(cmd, "Incomplete file received",
+                                     f"Missing {remaining} of {size} bytes")
+            print(error_msg)
+            try:
+                os.unlink(output_path)
+            except:
+                pass
+            return False
+
+        return self._report_received_file(cmd, filename, output_path, file_hash, hasher.hexdigest())
+
+    def _repo_file_to_send(self, cmd, filename):
+        """Find a file of the repository to send, or report why it cannot be sent"""
+        if not filename:
+            error_msg = self.log_error(cmd, "No filename specified",
+                                     "Command requires a filename")
+            print(error_msg)
+            print(f"Usage: {cmd.split()[0]} <filename>")
+            return None
+
+        # Only files from the repository directory can be sent
+        file_path = os.path.join(self.repo_dir, os.path.basename(filename))
+
+        if not os.path.isfile(file_path):
+            error_msg = self.log_error(cmd, f"File not found in repository: {filename}",
+                                     f"Checked path: {file_path}")
+            print(error_msg)
+            return None
+
+        return file_path
+
+    def send_file(self, filename):
+        """Send a file from the repository through SSH as base64"""
+        cmd = f"send {filename}"
+
+        file_path = self._repo_file_to_send(cmd, filename)
+        if file_path is None:
+            return False
+
+        try:
+            file_size = os.path.getsize(file_path)
+            print(f"Sending file: {filename} of size {file_size} bytes")
+
+            # Stream the file as standard 76-character base64 lines (57 raw bytes each),
+            # encoding about 1 MiB of whole lines at a time straight to the binary stdout
+            print("-----START FILE DATA-----")
+            sys.stdout.flush()
+            # (readinto() fills the whole window unless at the end of the file,
+            # so only the last line can be short)
+            window = bytearray(57 * ((1 << 20) // 57))
+            view = memoryview(window)
+            with open(file_path, 'rb') as f:
+                _advise_sequential(f)
+                while True:
+                    count = f.readinto(window)
+                    if not count:
+                        break
+                    sys.stdout.buffer.write(base64.encodebytes(view[:count]))
+            sys.stdout.buffer.flush()
+            print("-----END FILE DATA-----")
+
+            self.logger.info(f"Successfully sent file: {filename} of size {file_size} bytes")
+            return True
         except Exception as e:
-            error_msg = self.log_error(cmd, f"Error receiving file",
+            error_msg = self.log_error(cmd, f"Error sending file",
+                                     traceback.format_exc())
+            print(error_msg)
+            return False
+
+    def send_raw_file(self, args):
+        """Send a file from the repository through SSH as raw bytes, after a header with its size"""
+        # Clients quote the filename
+        try:
+            filename = " ".join(shlex.split(args))
+        except ValueError:
+            filename = args
+        cmd = f"send-raw {filename}"
+
+        file_path = self._repo_file_to_send(cmd, filename)
+        if file_path is None:
+            return False
+
+        try:
+            with open(file_path, 'rb') as f:
+                _advise_sequential(f)
+                file_size = os.fstat(f.fileno()).st_size
+                print(f"-----START FILE DATA {file_size}-----")
+                sys.stdout.flush()
+
+                # Let the kernel copy the file into the SSH pipe, if it can
+                offset = 0
+                try:
+                    while offset < file_size:
+                        sent = os.sendfile(sys.stdout.fileno(), f.fileno(), offset, file_size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                except (AttributeError, OSError):
+                    # No sendfile() for this output, copy the rest in user space
+                    f.seek(offset)
+                    shutil.copyfileobj(f, sys.stdout.buffer, 1 << 20)
+                    sys.stdout.buffer.flush()
+
+            self.logger.info(f"Successfully sent file: {filename} of size {file_size} bytes")
+            return True
+        except Exception as e:
+            error_msg = self.log_error(cmd, f"Error sending file",
                                      traceback.format_exc())
             print(error_msg)
             return False
 
     def log_command(self, command):
         """Log command to history file"""
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._history_buffer.append(f"{timestamp} - {command}\n")
+        if self.interactive or len(self._history_buffer) >= HISTORY_BATCH_SIZE:
+            self.flush_history()
+
+    def flush_history(self):
+        """Write the buffered command history lines to the history file"""
+        if not self._history_buffer:
+            return
+        data = "".join(self._history_buffer).encode('utf-8', 'replace')
+        self._history_buffer.clear()
         try:
-            with open(self.history_file, 'a') as f:
-                f.write(f"{timestamp} - {command}\n")
+            # A single O_APPEND write, so that concurrent sessions do not interleave lines
+            os.write(self._history_fd, data)
         except Exception as e:
             self.logger.warning(f"Failed to log command to history file: {e}")
 
     def process_command(self, cmd, args):
-        """Process a single command"""
+        """Process a single command, printing its result as JSON if requested with --json"""
+        as_json = False
+        if cmd in JSON_COMMANDS and "--json" in args.split():
+            as_json = True
+            args = " ".join(arg for arg in args.split() if arg != "--json")
+
+        self.result = {}
+        self.last_error = None
+        result = self._run_command(cmd, args)
+
+        if as_json:
+            if result:
+                print(json.dumps({"status": "ok", **self.result}))
+            else:
+                print(json.dumps({"status": "error", "message": self.last_error or "Command failed", **self.result}))
+
+        return result
+
+    def _run_command(self, cmd, args):
+        """Run the handler of a single command"""
         try:
-            if cmd == "add":
-                return self.add_package(args)
-            elif cmd == "remove":
-                return self.remove_package(args)
-            elif cmd == "list":
-                return self.list_packages()
-            elif cmd == "clean":
-                return self.clean_repo()
-            elif cmd == "status":
-                return self.show_status()
-            elif cmd == "receive":
-                return self.receive_file(args)
-            elif cmd == "errors":
-                return self.show_recent_errors()
-            elif cmd == "help":
-                self.show_help()
-                return True
-            elif cmd in ["exit", "quit", "logout"]:
+            handler = self._commands.get(cmd)
+            if handler is not None:
+                return handler(args)
+            elif cmd in EXIT_COMMANDS:
                 print("Logging out...")
                 return None  # Signal to exit
             else:
@@ -676,9 +1275,8 @@ class PackageRepositoryShell:
                     continue
 
                 # Parse command and arguments
-                parts = cmd_input.split(maxsplit=1)
-                cmd = parts[0]
-                args = parts[1] if len(parts) > 1 else ""
+                cmd, _, args = cmd_input.partition(" ")
+                args = args.lstrip()
 
                 # Log command (except exit)
                 if cmd != "exit":
@@ -702,15 +1300,18 @@ class PackageRepositoryShell:
 
     def process_stdin(self):
         """Process commands from standard input (non-interactive mode)"""
-        for line in sys.stdin:
+        for line in iter(self._readline, None):
             try:
                 line = line.strip()
                 if not line or line == "exit":
                     continue
 
-                parts = line.split(maxsplit=1)
-                cmd = parts[0]
-                args = parts[1] if len(parts) > 1 else ""
+                # partition() gives a fixed tuple instead of building a list per line
+                cmd, _, args = line.partition(" ")
+                args = args.lstrip()
+
+                # Log command, written out in batches
+                self.log_command(line)
 
                 self.process_command(cmd, args)
                 print()  # Empty line after each command
@@ -721,8 +1322,15 @@ class PackageRepositoryShell:
 
 if __name__ == "__main__":
     shell = PackageRepositoryShell()
+    # Handle a single command passed by SSH, e.g. "ssh host receive-raw ..."
+    if len(sys.argv) > 2 and sys.argv[1] == "-c" and sys.argv[2].strip():
+        parts = sys.argv[2].strip().split(maxsplit=1)
+        cmd = parts[0]
+        args = parts[1] if len(parts) > 1 else ""
+        shell.log_command(sys.argv[2].strip())
+        sys.exit(0 if shell.process_command(cmd, args) else 1)
     # Handle non-interactive mode
-    if not sys.stdin.isatty():
+    elif not sys.stdin.isatty():
         shell.process_stdin()
     else:
         shell.main_loop()
@@ -19,6 +19,11 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.6",
+    extras_require={
+        "fast": ["pybase64"],
+        "paramiko": ["paramiko"],
+        "async": ["asyncssh"],
+    },
     entry_points={
         "console_scripts": [
             "archrepo=archrepo.api:main",
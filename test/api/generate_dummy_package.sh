@@ -1,5 +1,6 @@
 #!/bin/bash
 # generate_dummy_package.sh - Creates a dummy Arch Linux package for testing using quasipkg
+# Usage: generate_dummy_package.sh [package-name]
 
 set -e
 
@@ -8,7 +9,7 @@ TEST_DIR="$(pwd)"
 mkdir -p "${TEST_DIR}/fixtures"
 cd "${TEST_DIR}/fixtures"
 
-PKG_NAME="test-package"
+PKG_NAME="${1:-test-package}"
 PKG_VER="1.0.0"
 PKG_REL="1"
 ARCH="x86_64"
@@ -18,10 +18,17 @@ import argparse
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 import pty
+import asyncio
+import json
+import tempfile
+from types import SimpleNamespace
 
 # Add parent directory to path so we can import archrepo
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from archrepo.api import ArchRepoClient
+from archrepo.pool import ArchRepoPool
+from archrepo.aio import AsyncArchRepoClient, AsyncArchRepoPool
+from archrepo.paramiko_backend import ParamikoSession
 
 
 class CustomTestResult(unittest.TextTestResult):
@@ -110,19 +117,21 @@ class CustomTestRunner(unittest.TextTestRunner):
 class DirectConnection:
     """Direct connection to pkg_shell.py instead of SSH"""
 
-    def __init__(self, shell_script, real_popen):
+    def __init__(self, shell_script, real_popen, host):
         self.shell_script = shell_script
-        self.returncode = 0
         self.real_popen = real_popen  # Store the real Popen
-
-    def communicate(self, input=None):
-        """Run commands directly through the shell script"""
-        process = self.real_popen(
-            [self.shell_script],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
+        self.host = host
+
+    def __call__(self, args, **kwargs):
+        """Start the shell script in place of the ssh process requested by the client"""
+        # A remote command after the host is passed to the login shell with -c, like sshd does
+        shell_args = [self.shell_script]
+        remote_command = args[args.index(self.host) + 1:]
+        if remote_command:
+            shell_args += ["-c", " ".join(remote_command)]
+
+        return self.real_popen(
+            shell_args,
             env={
                 "REPO_DIR": "/tmp/test_repo/x86_64",
                 "DB_NAME": "repo.db.tar.zst",
@@ -130,13 +139,218 @@ class DirectConnection:
                 "HISTORY_FILE": "/tmp/pkg_shell_test_history",
                 "ERROR_LOG_FILE": "/tmp/pkg_shell_direct_test_errors.log",
                 "PATH": os.environ.get("PATH")
-            }
+            },
+            **kwargs
         )
 
-        stdout, stderr = process.communicate(input=input)
-        self.returncode = process.returncode
 
-        return stdout, stderr
+class FakeAsyncConnection:
+    """Stand-in for an asyncssh connection, answering like pkg_shell does"""
+
+    def __init__(self):
+        self.commands = []
+        self.closed = False
+
+    async def run(self, command=None, input=None, stdin=None, encoding='utf-8'):
+        # Let other operations run, as waiting for the server would
+        await asyncio.sleep(0)
+        self.commands.append(command or input)
+        if command is not None and command.startswith("receive-raw"):
+            return SimpleNamespace(exit_status=0, stdout=b"Successfully received file: test\n", stderr=b"")
+        if input.startswith("add "):
+            return SimpleNamespace(exit_status=0, stdout="Package added successfully.\n", stderr="")
+        if input.startswith("status --json"):
+            result = {"status": "ok", "info": {"Total packages": "1"}}
+            return SimpleNamespace(exit_status=0, stdout=json.dumps(result) + "\n", stderr="")
+        return SimpleNamespace(exit_status=1, stdout="", stderr="Unknown command")
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+class TestAsyncArchRepoAPI(unittest.TestCase):
+    """Test suite for the asyncio API, with asyncssh replaced by fake connections"""
+
+    def setUp(self):
+        """Replace asyncssh.connect with a function opening fake connections"""
+        self.connections = []
+
+        async def connect(host, **kwargs):
+            await asyncio.sleep(0)
+            connection = FakeAsyncConnection()
+            self.connections.append(connection)
+            return connection
+
+        self.asyncssh_patcher = patch('archrepo.aio.asyncssh')
+        self.asyncssh_patcher.start().connect.side_effect = connect
+
+    def tearDown(self):
+        self.asyncssh_patcher.stop()
+
+    def test_publish_package_connects_once(self):
+        """Test that the uploads started together by publish_package share one connection"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            package_path = os.path.join(tmp_dir, "test-package-1.0.0-1-x86_64.pkg.tar.zst")
+            with open(package_path, 'wb') as f:
+                f.write(b"package")
+            with open(f"{package_path}.sig", 'wb') as f:
+                f.write(b"signature")
+
+            async def publish():
+                client = AsyncArchRepoClient("dummy-host")
+                try:
+                    return await client.publish_package(package_path)
+                finally:
+                    await client.close()
+
+            success, message = asyncio.run(publish())
+
+        if not success:
+            self.fail(f"Failed to publish package: {message}")
+        self.assertEqual(len(self.connections), 1, "Expected a single connection for all uploads")
+        self.assertTrue(self.connections[0].closed, "The connection should be closed")
+        self.assertEqual(len(self.connections[0].commands), 3, "Expected two uploads and an add")
+
+    def test_pool_connects_once(self):
+        """Test that concurrent calls on an unconnected pool connect each client once"""
+        async def get_statuses():
+            pool = AsyncArchRepoPool("dummy-host", size=2)
+            try:
+                return await pool.map("get_status", [(), (), (), ()])
+            finally:
+                await pool.close()
+
+        results = asyncio.run(get_statuses())
+
+        self.assertEqual(len(self.connections), 2, "Expected one connection per pool client")
+        self.assertEqual(len(results), 4, "Expected one result per call")
+        for success, status in results:
+            if not success:
+                self.fail(f"Failed to get repository status from pool: {status}")
+            self.assertEqual(status, {"Total packages": "1"})
+        self.assertEqual(sorted(len(connection.commands) for connection in self.connections), [2, 2],
+                         "The calls should be spread over the pool clients")
+
+
+class FakeChannel:
+    """Stand-in for a paramiko session channel, with canned output and exit status"""
+
+    def __init__(self, stdout=b"", stderr=b"", exit_status=0):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_status = exit_status
+        self.received = bytearray()
+        self.command = None
+        self.shell = False
+        self.write_shutdowns = 0
+
+    def exec_command(self, command):
+        self.command = command
+
+    def invoke_shell(self):
+        self.shell = True
+
+    def send(self, data):
+        # Accept only part of larger writes, like a channel with a full window
+        data = bytes(data[:4096])
+        self.received += data
+        return len(data)
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data
+
+    def shutdown_write(self):
+        self.write_shutdowns += 1
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+
+class FakeParamikoClient:
+    """Stand-in for a connected paramiko.SSHClient, opening the given channel"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_transport(self):
+        return SimpleNamespace(open_session=lambda: self.channel)
+
+    def close(self):
+        pass
+
+
+class TestParamikoSession(unittest.TestCase):
+    """Test suite for the Popen-like wrapper of paramiko channels"""
+
+    def test_exec_command_raw_output(self):
+        """Test reading raw output of a remote command with readinto"""
+        data = os.urandom(100000)
+        channel = FakeChannel(stdout=data, exit_status=0)
+        session = ParamikoSession(FakeParamikoClient(channel), "send-raw test.pkg.tar.zst", text=False)
+        self.assertEqual(channel.command, "send-raw test.pkg.tar.zst")
+        self.assertFalse(channel.shell, "A remote command should not start the login shell")
+
+        received = bytearray()
+        buffer = bytearray(8192)
+        while True:
+            count = session.stdout.readinto(buffer)
+            if not count:
+                break
+            received += buffer[:count]
+
+        self.assertEqual(bytes(received), data, "Output read with readinto differs from the channel data")
+        self.assertEqual(session.wait(), 0)
+        self.assertEqual(session.returncode, 0)
+
+    def test_communicate(self):
+        """Test that communicate sends the input, closes it with EOF and collects the output"""
+        channel = FakeChannel(stdout=b"Package added successfully.\n", stderr=b"warning\n", exit_status=3)
+        session = ParamikoSession(FakeParamikoClient(channel))
+        self.assertTrue(channel.shell, "Without a remote command the login shell should start")
+        self.assertIsNone(session.returncode)
+
+        commands = "add test.pkg.tar.zst\n" + "x" * 10000 + "\nexit\n"
+        session.stdin.write(commands)
+        stdout, stderr = session.communicate()
+
+        self.assertEqual(channel.received.decode(), commands, "The whole input should reach the channel")
+        self.assertEqual(channel.write_shutdowns, 1, "Closing stdin should send EOF once")
+        self.assertEqual(stdout, "Package added successfully.\n")
+        self.assertEqual(stderr, "warning\n")
+        self.assertEqual(session.returncode, 3)
+
+    def test_stdin_close_sends_eof(self):
+        """Test that closing stdin flushes it and sends EOF exactly once"""
+        channel = FakeChannel()
+        session = ParamikoSession(FakeParamikoClient(channel), "receive-raw test 5", text=False)
+        session.stdin.write(b"12345")
+        session.stdin.close()
+        session.stdin.close()
+
+        self.assertEqual(bytes(channel.received), b"12345")
+        self.assertEqual(channel.write_shutdowns, 1, "Closing stdin should send EOF once")
+
+    def test_client_registers_exit_handler_once(self):
+        """Test that the client registers close() at exit once per connection and unregisters it"""
+        client = ArchRepoClient("test-host", backend="paramiko")
+        with patch("archrepo.paramiko_backend.connect", return_value=FakeParamikoClient(FakeChannel())), \
+                patch("archrepo.api.atexit") as atexit_mock:
+            for _ in range(2):
+                client._open_session("list", text=False)
+                client._open_session("status", text=False)
+                client.close()
+                client.close()
+
+        self.assertEqual(atexit_mock.register.call_count, 2, "close() should be registered once per connection")
+        self.assertEqual(atexit_mock.unregister.call_count, 2, "close() should unregister itself once")
 
 
 class TestDirectArchRepoAPI(unittest.TestCase):
@@ -162,15 +376,20 @@ class TestDirectArchRepoAPI(unittest.TestCase):
         # Path to the dummy package
         cls.dummy_pkg = Path(__file__).parent / 'fixtures/test-package-1.0.0-1-x86_64.pkg.tar.zst'
 
-        # Ensure test package exists
-        if not cls.dummy_pkg.exists():
-            print(f"Warning: Test package not found at {cls.dummy_pkg}")
-            print("Running generate_dummy_package.sh...")
-            generator_script = Path(__file__).parent / 'generate_dummy_package.sh'
-            if generator_script.exists():
-                subprocess.run([str(generator_script)], check=True)
-            else:
-                raise FileNotFoundError(f"Could not find {generator_script}")
+        # A package whose name contains "-<digit>", like xorg-fonts-75dpi
+        cls.digit_pkg_name = 'test-fonts-75dpi'
+        cls.digit_pkg = Path(__file__).parent / f'fixtures/{cls.digit_pkg_name}-1.0.0-1-x86_64.pkg.tar.zst'
+
+        # Ensure test packages exist
+        for pkg, pkg_name in ((cls.dummy_pkg, 'test-package'), (cls.digit_pkg, cls.digit_pkg_name)):
+            if not pkg.exists():
+                print(f"Warning: Test package not found at {pkg}")
+                print("Running generate_dummy_package.sh...")
+                generator_script = Path(__file__).parent / 'generate_dummy_package.sh'
+                if generator_script.exists():
+                    subprocess.run([str(generator_script), pkg_name], check=True)
+                else:
+                    raise FileNotFoundError(f"Could not find {generator_script}")
 
     def setUp(self):
         """Set up before each test"""
@@ -186,9 +405,9 @@ class TestDirectArchRepoAPI(unittest.TestCase):
         self.popen_patcher = patch('subprocess.Popen')
         self.mock_popen = self.popen_patcher.start()
 
-        # Configure the mock to return our DirectConnection instance
-        self.direct_connection = DirectConnection(self.pkg_shell, self.real_popen)
-        self.mock_popen.return_value = self.direct_connection
+        # Configure the mock to start the shell through our DirectConnection instance
+        self.direct_connection = DirectConnection(self.pkg_shell, self.real_popen, self.client.host)
+        self.mock_popen.side_effect = self.direct_connection
 
     def tearDown(self):
         """Clean up after each test"""
@@ -232,6 +451,126 @@ class TestDirectArchRepoAPI(unittest.TestCase):
         if not success:
             self.fail(f"Failed to publish package without signature: {message}")
 
+    def test_publish_package_base64(self):
+        """Test publishing a package uploaded as base64"""
+        test_pkg_path = self.uploads_dir / self.dummy_pkg.name
+        shutil.copy(self.dummy_pkg, test_pkg_path)
+        shutil.copy(f"{self.dummy_pkg}.sig", f"{test_pkg_path}.sig")
+
+        success, message = self.client.publish_package(str(test_pkg_path), raw=False)
+        if not success:
+            self.fail(f"Failed to publish base64 package: {message}")
+
+        self.assertIn("successfully", message.lower())
+
+    def test_publish_packages(self):
+        """Test publishing packages added to the repository with a single add"""
+        test_pkg_path = self.uploads_dir / self.dummy_pkg.name
+        shutil.copy(self.dummy_pkg, test_pkg_path)
+        shutil.copy(f"{self.dummy_pkg}.sig", f"{test_pkg_path}.sig")
+
+        success, message = self.client.publish_packages([str(test_pkg_path)])
+        if not success:
+            self.fail(f"Failed to publish packages: {message}")
+
+        self.assertIn("successfully", message.lower())
+
+    def test_receive_base64_with_whitespace(self):
+        """Test that whitespace in base64 input does not corrupt uploads spanning several windows"""
+        data = os.urandom(1536 * 1024)
+        encoded = base64.b64encode(data).decode()
+        # Lines of 75 characters with a trailing space are not whole base64 quanta
+        lines = [encoded[i:i + 75] + " " for i in range(0, len(encoded), 75)]
+
+        session = self.direct_connection([self.client.host], stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdin = "receive whitespace.bin\n" + "\r\n".join(lines) + "\nEOF\nexit\n"
+        stdout, _ = session.communicate(stdin.encode(), timeout=60)
+
+        self.assertNotIn("Invalid base64 data", stdout.decode())
+        self.assertEqual((self.uploads_dir / "whitespace.bin").read_bytes(), data,
+                         "Received file differs from the encoded data")
+        (self.uploads_dir / "whitespace.bin").unlink()
+
+    def test_receive_raw_failure_discards_data(self):
+        """Test that raw data of a failed upload is not run as commands"""
+        # A directory in place of the uploaded file makes opening it fail
+        target = self.uploads_dir / "upload-target"
+        target.mkdir(exist_ok=True)
+        payload = b"echo INJECTED-FROM-PAYLOAD\n"
+
+        session = self.direct_connection([self.client.host], stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, _ = session.communicate(
+            f"receive-raw {target.name} {len(payload)}\n".encode() + payload + b"echo DONE\nexit\n", timeout=30)
+        stdout = stdout.decode()
+
+        self.assertIn("File I/O error", stdout, "Opening the upload target should fail")
+        self.assertNotIn("INJECTED-FROM-PAYLOAD", stdout, "The upload data must not be run as a command")
+        self.assertIn("DONE", stdout, "Commands after the upload data should still run")
+
+    def test_raw_transfer_quoted_filename(self):
+        """Test raw transfers of a file whose name needs quoting"""
+        filename = "notes (copy) 1.txt"
+        source_path = self.test_dir / "quoted-source.txt"
+        source_path.write_bytes(b"Data of a file with a quoted name\n")
+
+        success, message = self.client.upload_raw(str(source_path), filename)
+        if not success:
+            self.fail(f"Failed to upload file with a quoted name: {message}")
+        self.assertEqual((self.uploads_dir / filename).read_bytes(), source_path.read_bytes(),
+                         "The upload should be stored under its unquoted name")
+
+        shutil.move(self.uploads_dir / filename, self.x86_64_dir / filename)
+        output_path = self.test_dir / "quoted-download.txt"
+        success, message = self.client.download_package(filename, output_path=str(output_path))
+        if not success:
+            self.fail(f"Failed to download file with a quoted name: {message}")
+        self.assertEqual(output_path.read_bytes(), source_path.read_bytes(),
+                         "Downloaded file differs from the uploaded one")
+        (self.x86_64_dir / filename).unlink()
+
+    def test_add_packages_partial_failure(self):
+        """Test that adding packages some of which are rejected reports them and fails"""
+        shutil.copy(self.dummy_pkg, self.uploads_dir / self.dummy_pkg.name)
+        missing = "missing-1.0.0-1-x86_64.pkg.tar.zst"
+
+        session = self.direct_connection([self.client.host], stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, _ = session.communicate(f"add {self.dummy_pkg.name} {missing} --json\nexit\n".encode(), timeout=60)
+        stdout = stdout.decode()
+
+        result = json.loads([line for line in stdout.splitlines() if line.startswith("{")][-1])
+        self.assertEqual(result["status"], "error", "Adding should fail when a package is rejected")
+        self.assertEqual(result["added"], [self.dummy_pkg.name])
+        self.assertEqual(result["rejected"], [missing])
+        self.assertNotIn("added successfully", stdout, "No unqualified success should be reported")
+
+    def test_download_package(self):
+        """Test downloading a package from the repository"""
+        # First ensure we have the package in the repo
+        test_pkg_path = self.uploads_dir / self.dummy_pkg.name
+        shutil.copy(self.dummy_pkg, test_pkg_path)
+        success, message = self.client.publish_package(str(test_pkg_path), no_signing=True)
+        if not success:
+            self.fail(f"Failed to setup package for download: {message}")
+
+        for raw in (True, False):
+            output_path = self.test_dir / f"downloaded-{raw}-{self.dummy_pkg.name}"
+            success, message = self.client.download_package(self.dummy_pkg.name, output_path=str(output_path),
+                                                             raw=raw)
+            if not success:
+                self.fail(f"Failed to download package (raw={raw}): {message}")
+
+            self.assertEqual(output_path.read_bytes(), self.dummy_pkg.read_bytes(),
+                             f"Downloaded package differs from the published one (raw={raw})")
+
+        # Downloading a missing file must fail without leaving a partial file behind
+        missing_path = self.test_dir / "missing.pkg.tar.zst"
+        success, message = self.client.download_package("missing.pkg.tar.zst", output_path=str(missing_path))
+        self.assertFalse(success, "Downloading a missing package should fail")
+        self.assertFalse(missing_path.exists(), "No output file should be left for a failed download")
+
     def test_list_packages(self):
         """Test listing packages in the repository"""
         # First ensure we have at least one package in the repo
@@ -286,6 +625,21 @@ class TestDirectArchRepoAPI(unittest.TestCase):
         pkg_names = [p['name'] for p in packages]
         self.assertNotIn(pkg_name, pkg_names, f"Package {pkg_name} still in repo after removal")
 
+    def test_remove_package_name_with_digits(self):
+        """Test removing a package whose name contains "-<digit>" """
+        test_pkg_path = self.uploads_dir / self.digit_pkg.name
+        shutil.copy(self.digit_pkg, test_pkg_path)
+        success, message = self.client.publish_package(str(test_pkg_path), no_signing=True)
+        if not success:
+            self.fail(f"Failed to setup package for removal: {message}")
+
+        success, message = self.client.remove_package(self.digit_pkg_name)
+        if not success:
+            self.fail(f"Failed to remove package: {message}")
+
+        self.assertFalse((self.x86_64_dir / self.digit_pkg.name).exists(),
+                         f"Package file {self.digit_pkg.name} still in repo after removal")
+
     def test_clean_repository(self):
         """Test cleaning the repository of old package versions"""
         # Add multiple versions of the same package
@@ -324,6 +678,54 @@ class TestDirectArchRepoAPI(unittest.TestCase):
         self.assertTrue(any(latest_pkg_filename in str(f) for f in version_files),
                        f"Expected to find latest version {latest_version} in {[f.name for f in version_files]}")
 
+    def test_clean_repository_version_order(self):
+        """Test that cleaning compares versions like pacman rather than as strings"""
+        pkg_name = 'test-package'
+        cases = [
+            (['1.9.0', '1.10.0'], '1.10.0'),
+            (['2.0.0', '1:0.5.0'], '1:0.5.0'),
+        ]
+
+        for versions, latest_version in cases:
+            for version in versions:
+                test_pkg_path = self.uploads_dir / f"{pkg_name}-{version}-1-x86_64.pkg.tar.zst"
+                with open(test_pkg_path, 'w') as f:
+                    f.write(f"Test package version {version}")
+
+                success, message = self.client.publish_package(str(test_pkg_path), no_signing=True)
+                if not success:
+                    self.fail(f"Failed to setup package version {version} for cleaning: {message}")
+
+            success, message = self.client.clean_repository()
+            if not success:
+                self.fail(f"Failed to clean repository: {message}")
+
+            version_files = [f.name for f in self.x86_64_dir.glob(f"{pkg_name}-*.pkg.tar.zst")]
+            self.assertEqual(version_files, [f"{pkg_name}-{latest_version}-1-x86_64.pkg.tar.zst"],
+                             f"Expected only version {latest_version} of {versions} after cleaning")
+
+    def test_clean_repository_keeps_current_database(self):
+        """Test that cleaning does not re-add packages the database lists already"""
+        test_pkg_path = self.uploads_dir / self.digit_pkg.name
+        shutil.copy(self.digit_pkg, test_pkg_path)
+        success, message = self.client.publish_package(str(test_pkg_path), no_signing=True)
+        if not success:
+            self.fail(f"Failed to setup package for cleaning: {message}")
+
+        # The first cleaning brings the database up to date, the second has nothing to do
+        success, message = self.client.clean_repository()
+        if not success:
+            self.fail(f"Failed to clean repository: {message}")
+
+        db_path = self.x86_64_dir / 'repo.db.tar.zst'
+        db_mtime = db_path.stat().st_mtime_ns
+        success, message = self.client.clean_repository()
+        if not success:
+            self.fail(f"Failed to clean repository again: {message}")
+
+        self.assertEqual(db_path.stat().st_mtime_ns, db_mtime,
+                         "The database should not be updated when it lists the latest packages")
+
     def test_get_status(self):
         """Test getting repository status information"""
         # First ensure we have at least one package in the repo
@@ -346,6 +748,48 @@ class TestDirectArchRepoAPI(unittest.TestCase):
         for key in expected_keys:
             self.assertIn(key, status, f"Status should include '{key}'")
 
+    def test_batch(self):
+        """Test running several operations in a single session"""
+        with self.client.batch() as batch:
+            batch.list_packages()
+            batch.get_status()
+
+        self.assertEqual(len(batch.results), 2, "Expected one result per batched operation")
+
+        (list_success, packages), (status_success, status) = batch.results
+        if not list_success:
+            self.fail(f"Failed to list packages in batch: {packages}")
+        if not status_success:
+            self.fail(f"Failed to get repository status in batch: {status}")
+
+        self.assertIsInstance(packages, list, "Packages should be a list")
+        self.assertIn('Total packages', status, "Status should include 'Total packages'")
+
+    def test_persistent_session(self):
+        """Test running several operations in one session kept open between them"""
+        with ArchRepoClient(self.client.host, persistent=True) as client:
+            for _ in range(2):
+                success, status = client.get_status()
+                if not success:
+                    self.fail(f"Failed to get repository status in persistent session: {status}")
+                self.assertIn('Total packages', status, "Status should include 'Total packages'")
+
+            success, packages = client.list_packages()
+            if not success:
+                self.fail(f"Failed to list packages in persistent session: {packages}")
+            self.assertIsInstance(packages, list, "Packages should be a list")
+
+    def test_pool(self):
+        """Test running operations concurrently through a pool of clients"""
+        with ArchRepoPool(self.client.host, size=2) as pool:
+            results = pool.map("get_status", [(), (), ()])
+
+        self.assertEqual(len(results), 3, "Expected one result per call")
+        for success, status in results:
+            if not success:
+                self.fail(f"Failed to get repository status from pool: {status}")
+            self.assertIn('Total packages', status, "Status should include 'Total packages'")
+
 
 if __name__ == '__main__':
     # Parse command-line arguments